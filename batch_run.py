@@ -0,0 +1,191 @@
+# batch_run.py
+"""
+Batch runner for scripted playthroughs.
+
+Plays every input script in a directory against every prompt/state variant,
+in parallel on a thread or process pool, and writes one JSONL record per turn
+(what it changed in the state) plus one per playthrough (the final state).
+
+    python batch_run.py scripts/ --variants variants.json --out results.jsonl --workers 8
+    python batch_run.py scripts/ --mock --latency 0.05 --pool process
+
+A script is a text file with one player input per line; blank lines and lines
+starting with # are skipped. The variants file maps a variant name to any of
+"system_prompt_narrative", "system_prompt_updates", "initial_message",
+"initial_state" (an object, or a path to a JSON file) and "state_overrides"
+(top-level keys replaced in the initial state); anything omitted comes from
+main.py.
+
+Simple commands ("look", "inventory", "go north"...) are sent to the models
+like any other input, so every variant's prompts see them; pass
+--local-commands to answer them locally as the game does.
+"""
+import os
+import copy
+import json
+import time
+import glob
+import argparse
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+from game_session import GameSession
+from llm_backend import LLMBackend, MockBackend
+from main import INITIAL_STATE, MONITORS, SYSTEM_PROMPT_NARRATIVE, SYSTEM_PROMPT_UPDATES, INITIAL_MESSAGE
+from benchmark import percentile, scripted_updates
+
+# Backend shared by the playthroughs of one worker process (or of all threads)
+_backend: Optional[LLMBackend] = None
+
+def init_backend(mock: bool, latency: float, max_concurrency: int) -> None:
+    """Create the worker's backend: the mock, or a pooled API client allowing max_concurrency requests in flight."""
+    global _backend
+    if mock:
+        _backend = MockBackend(latency=latency, first_token_latency=latency / 4, updates=scripted_updates)
+    else:
+        from openai_client import PooledClient
+        _backend = PooledClient(os.getenv("OPENAI_API_KEY"), max_concurrency=max_concurrency)
+
+def load_scripts(directory: str) -> Dict[str, List[str]]:
+    """Read every *.txt script in directory, keyed by file name."""
+    scripts = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f]
+        scripts[os.path.basename(path)] = [line for line in lines if line and not line.startswith("#")]
+    return scripts
+
+def load_variants(path: Optional[str]) -> Dict[str, Dict]:
+    """Read the variants file and resolve each variant against main.py's defaults."""
+    raw = {"default": {}}
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+
+    variants = {}
+    for name, variant in raw.items():
+        initial_state = variant.get("initial_state", INITIAL_STATE)
+        if isinstance(initial_state, str):
+            with open(os.path.join(os.path.dirname(path or "."), initial_state), "r", encoding="utf-8") as f:
+                initial_state = json.load(f)
+        variants[name] = {
+            "system_prompt_narrative": variant.get("system_prompt_narrative", SYSTEM_PROMPT_NARRATIVE),
+            "system_prompt_updates": variant.get("system_prompt_updates", SYSTEM_PROMPT_UPDATES),
+            "initial_message": variant.get("initial_message", INITIAL_MESSAGE),
+            "initial_state": {**copy.deepcopy(initial_state), **variant.get("state_overrides", {})},
+        }
+    return variants
+
+def diff_value(old, new):
+    """Changed entries of a dict value (removed entries as None), or the new value itself."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed = {key: value for key, value in new.items() if old.get(key) != value}
+        changed.update({key: None for key in old if key not in new})
+        return changed
+    return new
+
+def play(script_name: str, inputs: List[str], variant_name: str, variant: Dict,
+         local_commands: bool = False) -> Tuple[List[Dict], Dict]:
+    """Play one script against one variant; return its per-turn records and final record."""
+    session = GameSession(variant["initial_state"], variant["system_prompt_narrative"], variant["system_prompt_updates"],
+                          MONITORS, initial_message=variant["initial_message"], backend=_backend,
+                          local_commands=local_commands)
+    session.game_state.pop_dirty()
+    previous = copy.deepcopy(session.game_state.state)  # Last recorded value of each key, to diff against
+    turns: List[Dict] = []
+    usage: Dict[str, int] = {}
+    started = time.perf_counter()
+
+    for user_input in inputs:
+        turn_started = time.perf_counter()
+        result = session.submit(user_input)
+        state = session.game_state.state
+        diff = {}
+        for key in sorted(session.game_state.pop_dirty()):
+            if key in state and state[key] != previous.get(key):
+                diff[key] = diff_value(previous.get(key), state[key])
+                previous[key] = copy.deepcopy(state[key])
+        turns.append({
+            "type": "turn", "script": script_name, "variant": variant_name, "seq": result.seq, "input": user_input,
+            "diff": diff, "error": result.error, "ms": round((time.perf_counter() - turn_started) * 1000, 3),
+        })
+        for name, count in result.usage.items():
+            usage[name] = usage.get(name, 0) + count
+
+    interpreter = session.interpreter.stats() if session.interpreter else {}
+    session.close()
+    final = {
+        "type": "final", "script": script_name, "variant": variant_name, "turns": len(inputs),
+        "elapsed_s": round(time.perf_counter() - started, 3), "state_hash": session.game_state.state_hash(),
+        "local_commands": local_commands, "local_hit_rate": round(interpreter.get("hit_rate", 0.0), 3), "usage": usage,
+        "state": session.game_state.state,
+    }
+    return turns, final
+
+def run(scripts: Dict[str, List[str]], variants: Dict[str, Dict], out: str, workers: int, pool: str,
+        mock: bool, latency: float, max_concurrency: int, local_commands: bool = False) -> Dict:
+    """Play every script against every variant, stream the records to out and return aggregate results."""
+    executor: Executor
+    if pool == "process":
+        # Each process has its own client, so the API limit is split between them
+        per_worker = max(1, max_concurrency // workers)
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_backend,
+                                       initargs=(mock, latency, per_worker))
+    else:
+        init_backend(mock, latency, max_concurrency)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+
+    latencies: List[float] = []
+    playthroughs = failed = 0
+    started = time.perf_counter()
+    with executor, open(out, "w", encoding="utf-8") as f:
+        futures = {executor.submit(play, script_name, inputs, variant_name, variant, local_commands): (script_name, variant_name)
+                   for script_name, inputs in scripts.items() for variant_name, variant in variants.items()}
+        for future in as_completed(futures):
+            try:
+                turns, final = future.result()
+            except Exception as e:
+                failed += 1
+                script_name, variant_name = futures[future]
+                f.write(json.dumps({"type": "failed", "script": script_name, "variant": variant_name, "error": str(e)}) + "\n")
+                continue
+            for record in turns + [final]:
+                f.write(json.dumps(record, separators=(',', ':')) + "\n")
+            latencies += [turn["ms"] / 1000 for turn in turns]
+            playthroughs += 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        "playthroughs": playthroughs,
+        "failed": failed,
+        "turns": len(latencies),
+        "elapsed_s": elapsed,
+        "turns_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play input scripts against prompt/state variants in parallel.")
+    parser.add_argument("scripts", help="Directory of *.txt input scripts.")
+    parser.add_argument("--variants", help="JSON file of prompt/initial state variants (default: main.py only).")
+    parser.add_argument("--out", default="batch_results.jsonl", help="JSONL output file.")
+    parser.add_argument("--workers", type=int, default=8, help="Playthroughs run in parallel.")
+    parser.add_argument("--pool", choices=["thread", "process"], default="thread")
+    parser.add_argument("--max-concurrency", type=int, default=int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+                        help="API requests in flight across all workers.")
+    parser.add_argument("--mock", action="store_true", help="Use the deterministic mock backend instead of the API.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per mock model call.")
+    parser.add_argument("--local-commands", action="store_true",
+                        help="Answer simple commands with the local interpreter instead of the models.")
+    args = parser.parse_args()
+
+    scripts = load_scripts(args.scripts)
+    if not scripts:
+        parser.error(f"no *.txt scripts in {args.scripts}")
+    variants = load_variants(args.variants)
+    result = run(scripts, variants, args.out, args.workers, args.pool, args.mock, args.latency, args.max_concurrency,
+                 args.local_commands)
+    print(f"{result['playthroughs']} playthroughs ({len(scripts)} scripts x {len(variants)} variants), "
+          f"{result['turns']} turns in {result['elapsed_s']:.2f}s: {result['turns_per_s']:.1f} turns/s, "
+          f"turn p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms"
+          + (f", {result['failed']} failed" if result['failed'] else "") + f" -> {args.out}")
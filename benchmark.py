@@ -0,0 +1,153 @@
+# benchmark.py
+"""
+Headless turn-latency benchmark.
+
+Plays scripted sessions against the deterministic MockBackend and reports
+per-stage p50/p99 latency, session throughput and memory growth, so the
+engine's own overhead can be measured without live API calls.
+
+    python benchmark.py --turns 10 100 1000 --latency 0.05 --mode serial pipelined
+    python benchmark.py --replay saves/default
+"""
+import argparse
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from game_session import GameSession, Turn
+from llm_backend import MockBackend
+from save_journal import SaveJournal
+from main import INITIAL_STATE, MONITORS, SYSTEM_PROMPT_NARRATIVE, SYSTEM_PROMPT_UPDATES, INITIAL_MESSAGE
+
+SCRIPT = [
+    "look around",
+    "check my inventory",
+    "walk to the lobby",
+    "talk to the NCR guard",
+    "pick up the pen",
+    "open the door to the north",
+]
+
+STAGES = ["prompt_build", "narrative", "state_update", "monitor_apply", "render"]
+
+def scripted_updates(call: int, player_input: str) -> Dict:
+    """Grow the world by one room per turn and advance the clock."""
+    return {
+        "time": f"{2 + call // 60}:{call % 60:02d} PM",
+        "location": {f"Room {call}": {"coordinates": [call, 1], "description": f"Room {call}", "objects": ["Debris"]}},
+        "relationships": {"NCR": call % 100},
+    }
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def run_session(turns: int, latency: float, mode: str, script: List[str] = SCRIPT, initial_state: Dict = INITIAL_STATE) -> Dict:
+    """Play one scripted session and return its timings."""
+    backend = MockBackend(latency=latency, first_token_latency=latency / 4, updates=scripted_updates)
+    session = GameSession(initial_state, SYSTEM_PROMPT_NARRATIVE, SYSTEM_PROMPT_UPDATES, MONITORS,
+                          initial_message=INITIAL_MESSAGE, backend=backend)
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    usage: Dict[str, int] = {}
+
+    def timed(stage: str, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        timings[stage].append(time.perf_counter() - started)
+        return result
+
+    def finish(turn: Turn) -> None:
+        result = timed("monitor_apply", session.finish_turn, turn)
+        for name, count in result.usage.items():
+            usage[name] = usage.get(name, 0) + count
+        if result.applied:
+            timed("render", lambda: session.game_state.format_sections(session.game_state.pop_dirty()))
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    pending = None
+    tracemalloc.start()
+    memory_start = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+
+    for seq in range(1, turns + 1):
+        turn = timed("prompt_build", session.begin_turn, script[(seq - 1) % len(script)])
+        timed("narrative", session.narrate, turn, lambda chunk: None)
+        session.record_narrative(turn)
+
+        if mode == "pipelined":
+            if pending is not None:
+                finish(pending.result())
+            pending = executor.submit(lambda t=turn: (timed("state_update", session.extract_updates, t), t)[1])
+        else:
+            timed("state_update", session.extract_updates, turn)
+            finish(turn)
+
+    if pending is not None:
+        finish(pending.result())
+    elapsed = time.perf_counter() - started
+    memory_end, memory_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    executor.shutdown()
+
+    return {
+        "turns": turns,
+        "mode": mode,
+        "state_hash": session.game_state.state_hash(),
+        "elapsed_s": elapsed,
+        "turns_per_s": turns / elapsed if elapsed else 0.0,
+        "memory_growth_kb": (memory_end - memory_start) / 1024,
+        "memory_peak_kb": memory_peak / 1024,
+        "stages": {stage: (percentile(values, 0.5), percentile(values, 0.99)) for stage, values in timings.items()},
+        "usage": usage,
+        "spans": {span: (percentile(values, 0.5), percentile(values, 0.99))
+                  for span, values in collect_spans(session.turn_timings).items()},
+    }
+
+def collect_spans(turn_timings) -> Dict[str, List[float]]:
+    """Group the per-turn spans a session recorded (API latency, parsing, ...) by name."""
+    spans: Dict[str, List[float]] = {}
+    for timing in turn_timings:
+        for span, seconds in timing.items():
+            if span != "seq":
+                spans.setdefault(span, []).append(seconds)
+    return spans
+
+def print_report(result: Dict) -> None:
+    """Print one session's results."""
+    print(f"\n{result['turns']} turns ({result['mode']}, final state {result['state_hash'][:12]}): {result['elapsed_s']:.2f}s, "
+          f"{result['turns_per_s']:.1f} turns/s, memory +{result['memory_growth_kb']:.0f} KiB "
+          f"(peak {result['memory_peak_kb']:.0f} KiB)")
+    for stage, (p50, p99) in result["stages"].items():
+        print(f"  {stage:<14} p50 {p50 * 1000:8.3f} ms   p99 {p99 * 1000:8.3f} ms")
+    usage = result["usage"]
+    for model in ("narrative", "update"):
+        prompt = usage.get(f"{model}_prompt_tokens", 0)
+        if prompt:
+            print(f"  {model} prompt tokens: {prompt}, {usage.get(f'{model}_cached_tokens', 0) / prompt:.0%} from prefix cache")
+    print("  turn spans:")
+    for span, (p50, p99) in sorted(result["spans"].items()):
+        print(f"    {span:<20} p50 {p50 * 1000:8.3f} ms   p99 {p99 * 1000:8.3f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless turn-latency benchmark against the mock backend.")
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 1000], help="Session lengths to play.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per model call.")
+    parser.add_argument("--mode", nargs="+", choices=["serial", "pipelined"], default=["serial"],
+                        help="Run state updates serially or overlapped with the next narration.")
+    parser.add_argument("--replay", metavar="SAVE_DIR",
+                        help="Replay the inputs journaled in a save directory, starting from its latest snapshot.")
+    args = parser.parse_args()
+
+    script, initial_state, lengths = SCRIPT, INITIAL_STATE, args.turns
+    if args.replay:
+        snapshot, journaled = SaveJournal.read(args.replay)
+        script = [turn["input"] for turn in journaled] or SCRIPT
+        initial_state = snapshot["state"] if snapshot else INITIAL_STATE
+        lengths = [len(script)]
+
+    for mode in args.mode:
+        for turns in lengths:
+            print_report(run_session(turns, args.latency, mode, script, initial_state))
@@ -0,0 +1,175 @@
+# command_interpreter.py
+import re
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+DIRECTION_ALIASES = {"n": "north", "e": "east", "s": "south", "w": "west"}
+
+@dataclass
+class LocalAnswer:
+    """A command answered without the models: the text to show and any state updates it makes."""
+    command: str
+    text: str
+    updates: Dict = field(default_factory=dict)
+
+class CommandInterpreter:
+    def __init__(self):
+        """
+        Answer deterministic commands straight from the game state.
+
+        Queries (inventory, look, health, where am I) never change the state.
+        Actions (drop a carried item, move to an adjacent mapped room) return
+        state updates in the same format as the state update model, so they go
+        through the monitors like any other update. Anything else, or anything
+        ambiguous, returns None and is left to the models.
+        """
+        self.queries: List[Tuple[str, Pattern, Callable]] = [
+            ("inventory", re.compile(r"^(i|inv|inventory|(check|show)( my)? (inventory|bag|pack)|what am i carrying)$"), self._inventory),
+            ("look", re.compile(r"^(l|look|look around)$"), self._look),
+            ("health", re.compile(r"^(hp|health|status|(check|show)( my)? (health|status|hp))$"), self._health),
+            ("where", re.compile(r"^(where am i|where are we|location|(check|show)( my)? location)$"), self._where),
+        ]
+        self.actions: List[Tuple[str, Pattern, Callable]] = [
+            ("drop", re.compile(r"^drop (the |my )?(?P<item>.+)$"), self._drop),
+            # A bare compass direction, or a movement verb followed by a direction or room name
+            ("move", re.compile(r"^(((go|walk|move|head|run)( to( the)?)? )?(?P<direction>north|east|south|west|[nesw])"
+                                r"|(go|walk|move|head|run)( to( the)?| into( the)?)? (?P<room>.+))$"), self._move),
+        ]
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(user_input: str) -> str:
+        return ' '.join(user_input.lower().strip().rstrip('.!?').split())
+
+    def interpret(self, user_input: str, game_state: 'GameState', allow_actions: bool = True) -> Optional[LocalAnswer]:
+        """Answer a command locally, or return None to fall back to the models."""
+        command = self._normalize(user_input)
+        answer = None
+        for name, pattern, handler in self.queries:
+            if pattern.match(command):
+                answer = LocalAnswer(name, handler(game_state))
+                break
+        else:
+            if allow_actions:
+                for name, pattern, handler in self.actions:
+                    match = pattern.match(command)
+                    answer = handler(match, game_state) if match else None
+                    if answer:
+                        break
+
+        with self._lock:
+            self.counts[answer.command if answer else "llm"] += 1
+        return answer
+
+    def stats(self) -> Dict:
+        """Per-command counts and the share of commands answered locally."""
+        with self._lock:
+            total = sum(self.counts.values())
+            local = total - self.counts["llm"]
+            return {"local": local, "llm": self.counts["llm"], "hit_rate": local / total if total else 0.0,
+                    "by_command": {name: count for name, count in self.counts.items() if name != "llm"}}
+
+    # Queries ------------------------------------------------------------
+
+    @staticmethod
+    def _inventory(game_state: 'GameState') -> str:
+        items = game_state.state.get("inventory", [])
+        held = [f"{part['holding']} ({name.replace('_', ' ')})" for name, part in game_state.state.get("limb", {}).items()
+                if isinstance(part, dict) and part.get("holding", "nothing") != "nothing"]
+        text = f"You are carrying: {', '.join(items)}." if items else "You aren't carrying anything."
+        if held:
+            text += f" In hand: {', '.join(held)}."
+        return text
+
+    @staticmethod
+    def _look(game_state: 'GameState') -> str:
+        rooms = game_state.current_rooms()
+        if not rooms:
+            return "You don't recognise this place."
+        locations = game_state.state.get("location", {})
+        lines = []
+        for name in rooms:
+            room = locations[name]
+            objects = [item for item in room.get("objects", []) if item]
+            line = room.get("description") or name
+            if objects:
+                line += f". You see: {', '.join(objects)}."
+            lines.append(line)
+        exits = game_state.spatial.neighbours(game_state.state["coordinates"])
+        if exits:
+            lines.append("Exits: " + '; '.join(f"{direction}: {', '.join(names)}" for direction, names in exits.items()) + ".")
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _health(game_state: 'GameState') -> str:
+        text = f"Health: {game_state.state.get('health', '?')}/100."
+        hurt = [f"{name.replace('_', ' ')} {part.get('status')} ({part.get('hp')} hp)"
+                for name, part in game_state.state.get("limb", {}).items()
+                if isinstance(part, dict) and part.get("status") != "healthy"]
+        return text + (f" Injuries: {', '.join(hurt)}." if hurt else " No injuries.")
+
+    @staticmethod
+    def _where(game_state: 'GameState') -> str:
+        coordinates = game_state.state.get("coordinates")
+        rooms = game_state.current_rooms()
+        if not rooms:
+            return f"You are somewhere unfamiliar at {coordinates}."
+        return f"You are in the {' / '.join(rooms)} at {coordinates}.\n" + game_state.spatial.describe(coordinates).split('\n', 1)[-1]
+
+    # Actions ------------------------------------------------------------
+
+    @staticmethod
+    def _drop(match: 're.Match', game_state: 'GameState') -> Optional[LocalAnswer]:
+        """Drop a carried or held item into the current room."""
+        wanted = match.group("item")
+        inventory = game_state.state.get("inventory", [])
+        limbs = game_state.state.get("limb", {})
+        hands = {name: {"holding": "nothing"} for name, part in limbs.items()
+                 if isinstance(part, dict) and str(part.get("holding", "")).lower() == wanted}
+        item = next((item for item in inventory if item.lower() == wanted), None)
+        held = next((limbs[name]["holding"] for name in hands), None)
+        if item is None and held is None:
+            return None  # Not an exact match ("drop my gun", "drop the pistol and run"): let the models decide
+
+        updates: Dict = {"inventory": {"remove": [item]}} if item else {}
+        item = item or held
+        rooms = game_state.current_rooms()
+        if rooms:
+            room = game_state.state["location"][rooms[0]]
+            updates["location"] = {rooms[0]: {"objects": [o for o in room.get("objects", []) if o] + [item]}}
+        if hands:
+            updates["limb"] = hands
+        return LocalAnswer("drop", f"You drop the {item}.", updates)
+
+    @staticmethod
+    def _move(match: 're.Match', game_state: 'GameState') -> Optional[LocalAnswer]:
+        """Move to an adjacent known room, named or by compass direction."""
+        coordinates = game_state.state.get("coordinates")
+        rooms = game_state.current_rooms()
+        if not rooms:
+            return None
+        target = match.group("direction") or match.group("room")
+        target = DIRECTION_ALIASES.get(target, target)
+        spatial = game_state.spatial
+        exits = spatial.neighbours(coordinates)
+        if target in exits:
+            destination = exits[target][0]
+        else:
+            adjacent = set().union(*(spatial.connected(room) for room in rooms))
+            destination = next((name for name in sorted(adjacent) if name.lower() == target), None)
+            if destination is None:
+                return None  # Unknown or not adjacent: let the models decide what happens
+        room = game_state.state["location"][destination]
+        objects = [item for item in room.get("objects", []) if item]
+        text = f"You make your way to the {destination}."
+        if room.get("description") and room["description"] != destination:
+            text += f" {room['description']}"
+        if objects:
+            text += f"\nYou see: {', '.join(objects)}."
+        return LocalAnswer("move", text, {"coordinates": list(spatial.positions[destination])})
@@ -0,0 +1,110 @@
+# context_window.py
+import threading
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Approximate per-message framing cost of the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+class ContextWindow:
+    def __init__(self, token_budget: int = 3000, summary_interval: int = 10):
+        """
+        Keep the conversation history within a token budget.
+
+        Each message is tokenized once when appended and a running total is kept.
+        Messages that no longer fit are evicted oldest-first and folded into a
+        rolling summary, which is only refreshed every summary_interval turns.
+
+        :param token_budget: Maximum tokens for the summary plus recent messages.
+        :param summary_interval: Player turns between summary refreshes.
+        """
+        self.token_budget = token_budget
+        self.summary_interval = summary_interval
+        self.messages: Deque[Tuple[Dict, int]] = deque()
+        self.total_tokens = 0
+        self.summary = ""
+        self.summary_tokens = 0
+        self.folded: List[Dict] = []  # Evicted messages not yet summarized
+        self.turns_since_summary = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def append(self, message: Dict) -> None:
+        """Add a message, counting its tokens once, and evict what no longer fits."""
+        tokens = estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+        with self._lock:
+            self.messages.append((message, tokens))
+            self.total_tokens += tokens
+            if message["role"] == "user":
+                self.turns_since_summary += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        """Move the oldest messages to the fold list until the window fits the budget."""
+        while len(self.messages) > 1 and self.total_tokens + self.summary_tokens > self.token_budget:
+            message, tokens = self.messages.popleft()
+            self.total_tokens -= tokens
+            self.folded.append(message)
+
+    def window(self) -> List[Dict]:
+        """Return the messages to send: the rolling summary followed by recent history."""
+        with self._lock:
+            messages = [message for message, _ in self.messages]
+            summary = self.summary
+        if summary:
+            return [{"role": "system", "content": f"Story so far: {summary}"}] + messages
+        return messages
+
+    def export(self) -> Dict:
+        """Return the summary and recent messages for saving."""
+        with self._lock:
+            return {"summary": self.summary, "messages": [message for message, _ in self.messages],
+                    "folded": list(self.folded)}
+
+    def restore(self, saved: Dict) -> None:
+        """Replace the window's contents with a saved export."""
+        with self._lock:
+            self.messages.clear()
+            self.total_tokens = 0
+            self.summary = saved.get("summary", "")
+            self.summary_tokens = estimate_tokens(self.summary) + MESSAGE_OVERHEAD_TOKENS if self.summary else 0
+            self.folded = list(saved.get("folded", []))
+        for message in saved.get("messages", []):
+            self.append(message)
+
+    def summary_due(self) -> bool:
+        """Return True if evicted messages are waiting and the refresh interval has passed."""
+        return bool(self.folded) and self.turns_since_summary >= self.summary_interval
+
+    def refresh_summary(self, summarizer: Callable[[str, List[Dict]], Optional[str]]) -> bool:
+        """
+        Fold evicted messages into the summary with summarizer(previous_summary, messages).
+
+        If the summarizer fails (returns None), the messages are kept for the next refresh.
+        """
+        with self._lock:
+            folded, self.folded = self.folded, []
+            previous = self.summary
+            self.turns_since_summary = 0
+        if not folded:
+            return False
+
+        summary = summarizer(previous, folded)
+        if summary is None:
+            with self._lock:
+                self.folded[:0] = folded  # Ahead of anything evicted meanwhile
+            logger.warning(f"Summary refresh failed; {len(folded)} messages kept for the next one")
+            return False
+        with self._lock:
+            self.summary = summary
+            self.summary_tokens = estimate_tokens(summary) + MESSAGE_OVERHEAD_TOKENS
+            self._evict()
+        logger.info(f"Context window: {self.total_tokens + self.summary_tokens}/{self.token_budget} tokens, "
+                    f"{len(self.messages)} messages, summary {self.summary_tokens} tokens")
+        return True
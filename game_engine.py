@@ -1,55 +1,163 @@
 #game_engine.py
+import os
 import tkinter as tk
-from typing import List, Optional, Dict
-from game_state import GameState
-from narrative_model import MainNarrativeModel
-from state_update_model import StateUpdateModel
+from typing import List, Optional, Dict, Union
+from game_session import GameSession, Turn
 from game_gui import GameGUI
-from dotenv import load_dotenv
-import os
-
-# Load environment variables (e.g., OPENAI_API_KEY)
-load_dotenv()
+from turn_pipeline import TurnPipeline
+from response_cache import ResponseCache
+from llm_backend import LLMBackend
+from save_journal import SaveJournal
+from metrics import MetricsLog, format_hud
+import logging
 
-api_key = os.getenv("OPENAI_API_KEY")
+logger = logging.getLogger(__name__)
 
 class GameEngine:
-    def __init__(self, initial_state: Dict, system_prompt_narrative: str, system_prompt_updates: str, monitors: List['MonitorModel'], initial_message: Optional[str] = None):
-        """Initialize the game engine with state, prompts, monitors, and optional initial message."""
-        self.game_state = GameState(initial_state)
-        self.narrative_model = MainNarrativeModel(api_key, system_prompt=system_prompt_narrative)
-        self.state_update_model = StateUpdateModel(api_key, system_prompt=system_prompt_updates)
-        self.monitors = monitors
-        self.history: List[Dict] = []
-        self.initial_message = initial_message
+    def __init__(self, initial_state: Dict, system_prompt_narrative: str, system_prompt_updates: str, monitors: List['MonitorModel'], initial_message: Optional[str] = None, stream_narrative: bool = True, pipelined: bool = True, context_token_budget: int = 3000, summary_interval: int = 10, response_cache: Optional[ResponseCache] = None, backend: Optional[LLMBackend] = None, save_dir: Optional[str] = None, world_generation: bool = True, metrics_path: Optional[str] = None, show_hud: bool = False, new_game: bool = False):
+        """
+        Initialize the Tk frontend for a game session with state, prompts, monitors, and optional initial message.
+
+        The game resumes from save_dir if it holds a save; with new_game, the old save is archived and a new one started.
+        """
+        if save_dir and new_game:
+            SaveJournal.archive(save_dir)
+        self.journal = SaveJournal(save_dir) if save_dir else None
+        self.metrics_log = MetricsLog(metrics_path) if metrics_path else None
+        self.session = GameSession(initial_state, system_prompt_narrative, system_prompt_updates, monitors,
+                                   initial_message=initial_message, context_token_budget=context_token_budget,
+                                   summary_interval=summary_interval, response_cache=response_cache, backend=backend,
+                                   journal=self.journal, world_generation=world_generation,
+                                   metrics_log=self.metrics_log, restore_dir=save_dir)
+        restored_turn = self.session.turn_seq
+        self.game_state = self.session.game_state
+        self.history = self.session.history
+        self.stream_narrative = stream_narrative
+        self.pipelined = pipelined
 
         self.root = tk.Tk()
-        self.gui = GameGUI(self.root, self.process_input)
+        scrollback_path = os.path.join(save_dir, "scrollback.jsonl") if save_dir else None
+        self.gui = GameGUI(self.root, self.process_input, scrollback_path=scrollback_path, show_hud=show_hud)
+        self.pipeline = TurnPipeline(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
-        if self.initial_message:
-            self.gui.display(self.initial_message)
-            self.history.append({"role": "assistant", "content": self.initial_message})
+        if restored_turn:
+            self.gui.display(f"Loaded saved game at turn {restored_turn}.")
+        elif initial_message:
+            self.gui.display(initial_message)
 
-        self.gui.update_state_label(self.game_state.format_state())
+        self.gui.update_state_sections(self.game_state.format_sections())
+        self.game_state.pop_dirty()
 
     def run(self) -> None:
         """Start the game loop."""
         self.root.mainloop()
 
-    def process_input(self, event: tk.Event) -> None:
-        """Process user input and update the game."""
-        user_input = self.gui.input_field.get()
-        self.gui.input_field.delete(0, tk.END)
-        self.history.append({"role": "user", "content": user_input})
+    def close(self) -> None:
+        """Stop background workers and close the window."""
+        self.pipeline.shutdown()
+        self.session.close()
+        if self.journal:
+            self.journal.close()
+        if self.metrics_log:
+            self.metrics_log.close()
+        self.gui.close()
+        self.root.destroy()
+
+    def process_input(self, user_input: str) -> None:
+        """Answer simple commands locally; otherwise queue a turn whose LLM calls run off the Tk thread."""
+        local = self.session.try_local(user_input)
+        if local:
+            self.gui.accept_input()
+            self.gui.display(local.narrative)
+            self.gui.update_state_sections(self.game_state.format_sections(self.game_state.pop_dirty()))
+            return
+        turn = self.session.begin_turn(user_input)
+        self.pipeline.submit(self._run_turn, lambda result, error: self._finish_turn(turn, error), turn)
+
+    def _run_turn(self, turn: Turn) -> Turn:
+        """Generate the narrative, then immediately extract state updates. Runs on a worker thread."""
+        if self.stream_narrative:
+            self._stream_narrative(turn)
+        else:
+            self.session.narrate(turn)
+        self.pipeline.post(self._finish_narrative, turn)
+        self.session.extract_updates(turn, lambda key, value: self.pipeline.post(self._apply_update, turn, key, value))
+        return turn
+
+    def _stream_narrative(self, turn: Turn) -> None:
+        """Forward narrative chunks to the GUI as they arrive."""
+        started = []
+
+        def on_chunk(chunk: str) -> None:
+            if not started:
+                started.append(True)
+                self.pipeline.post(self._begin_narrative)
+            self.pipeline.post(self.gui.append_stream, chunk)
+
+        self.session.narrate(turn, on_chunk)
+        if not started:
+            self.pipeline.post(self._begin_narrative)
+        self.pipeline.post(self._end_narrative, turn)
+
+    def _begin_narrative(self) -> None:
+        """Replace the loading animation with the streamed narrative."""
+        self.gui.finish_loading()
+        self.gui.begin_stream()
+
+    def _end_narrative(self, turn: Turn) -> None:
+        """Flush the streamed narrative and count its widget updates as render time."""
+        self.gui.end_stream()
+        turn.metrics.add("render_s", self.gui.stream_render_s)
+
+    def _finish_narrative(self, turn: Turn) -> None:
+        """Record the narrative and, in pipelined mode, accept the next input. Runs on the Tk thread."""
+        if not self.stream_narrative:
+            self.gui.finish_loading()
+            with turn.metrics.span("render_s"):
+                self.gui.display(turn.narrative)
+        self.session.record_narrative(turn)
+        if self.pipelined:
+            self.gui.accept_input()
+
+    def _apply_update(self, turn: Turn, key: str, value) -> None:
+        """Apply a streamed state update as soon as it arrives. Runs on the Tk thread."""
+        if self.session.apply_update(turn, key, value):
+            with turn.metrics.span("render_s"):
+                self.gui.update_state_sections(self.game_state.format_sections(self.game_state.pop_dirty()))
+
+    def _finish_turn(self, turn: Turn, error: Optional[Exception]) -> None:
+        """Apply a turn's state updates and refresh the state panel. Runs on the Tk thread."""
+        if error:
+            self.session.cancel_turn(turn)
+            if turn.seq == self.session.turn_seq:  # Only the latest turn owns the loading line, stream and input lock
+                if self.gui.stream_tag:
+                    self.gui.end_stream()
+                self.gui.accept_input()
+            self._show_turn_error(turn, error)
+            return
+
+        if not self.pipelined:
+            self.gui.accept_input()
+
+        result = self.session.finish_turn(turn, record=False)
+        with turn.metrics.span("render_s"):
+            if result.error:
+                self._show_turn_error(turn, result.error)
+            elif result.applied:
+                self.gui.update_state_sections(self.game_state.format_sections(self.game_state.pop_dirty()))
+        self.session.record_metrics(turn)
+        self.gui.set_hud(format_hud(turn.seq, turn.metrics))
 
-        narrative = self.narrative_model.generate_narrative(user_input, self.game_state, self.history)
-        self.gui.display(narrative)
-        self.history.append({"role": "assistant", "content": narrative})
+    def _show_turn_error(self, turn: Turn, error: Union[Exception, str]) -> None:
+        """
+        Show a turn's error in the output if nothing is being drawn there, else in the error label.
 
-        updates, error_message = self.state_update_model.analyze_narrative(user_input, narrative, self.game_state)
-        if error_message:
-            self.gui.display(f"Error: {error_message}")
+        In pipelined mode an older turn's update can fail while a newer turn is
+        loading or streaming; writing to the output then would split the stream or
+        be erased by the loading animation.
+        """
+        if turn.seq == self.session.turn_seq and not self.gui.loading and not self.gui.stream_tag:
+            self.gui.display(f"Error: {error}", is_error=True)
         else:
-            for monitor in self.monitors:
-                monitor.update_state(updates, self.game_state)
-            self.gui.update_state_label(self.game_state.format_state())
\ No newline at end of file
+            self.gui.show_error(f"Turn {turn.seq}: {error}")
@@ -1,10 +1,22 @@
 # game_gui.py
+import time
 import tkinter as tk
-from typing import Callable
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+from scrollback import ScrollbackLog
 
 class GameGUI:
-    def __init__(self, root: tk.Tk, process_input_callback: Callable[[tk.Event], None]):
-        """Initialize the GUI with a root window and input callback."""
+    def __init__(self, root: tk.Tk, process_input_callback: Callable[[str], None], scrollback_lines: int = 2000,
+                 scrollback_path: Optional[str] = None, page_blocks: int = 50, history_limit: int = 500,
+                 show_hud: bool = False):
+        """
+        Initialize the GUI with a root window and input callback.
+
+        The output area keeps at most about scrollback_lines lines; older output is
+        written to a scrollback log and paged back in (page_blocks responses at a
+        time) when you scroll to the top. At most history_limit commands are kept
+        for Up/Down recall. The per-turn metrics HUD is toggled with F2.
+        """
         self.root = root
         self.root.title("Text Adventure Game")
         self.root.configure(bg='#2d2d2d')
@@ -31,9 +43,11 @@ class GameGUI:
 
         self.scrollbar = tk.Scrollbar(self.output_frame, command=self.output.yview)
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.output.config(yscrollcommand=self.scrollbar.set)
-        
-        # Configure text tags
+        self.output.config(yscrollcommand=self._on_scroll)
+
+        # Configure text tags; this fixed set is reused for every response
+        for index, color in enumerate(self.response_colors):
+            self.output.tag_config(f'color_{index}', foreground=color)
         self.output.tag_config('error', foreground=self.colors['error'])
         self.output.tag_config('normal', foreground=self.colors['text'])
         self.output.tag_config('loading', foreground='#aaaaaa')  # Gray for loading text
@@ -67,25 +81,194 @@ class GameGUI:
                                   bg=self.colors['background'])
         self.error_label.pack()
 
-        self.history = []
+        # Metrics HUD, shown below the error line when enabled
+        self.hud_label = tk.Label(self.root, text="", fg='#88cc88', bg=self.colors['background'],
+                                  font=('Courier', 9), anchor='w', justify=tk.LEFT)
+        self.hud_visible = False
+        if show_hud:
+            self.toggle_hud()
+        self.root.bind("<F2>", self.toggle_hud)
+
+        self.history: Deque[str] = deque(maxlen=history_limit)
         self.history_pos = -1
         self.loading = False  # Track loading state
         self.loading_id = None  # Store animation ID
+        self.busy = False  # Input is locked until the engine calls accept_input()
+
+        # Streaming output: chunks are buffered and flushed at most every stream_flush_ms
+        self.stream_flush_ms = 50
+        self.stream_tag = None
+        self.stream_buffer = []
+        self.stream_text: List[str] = []  # The whole streamed response, logged when it ends
+        self.stream_flush_id = None
+        self.stream_render_s = 0.0  # Time spent inserting the current stream into the widget
+
+        # Scrollback: the widget shows logged blocks [first_block, last_block)
+        self.scrollback_lines = scrollback_lines
+        self.page_blocks = page_blocks
+        self.scrollback = ScrollbackLog(scrollback_path)
+        self.first_block = self.last_block = len(self.scrollback)
+        self.block_lines: Deque[int] = deque()  # Line count of each shown block, oldest first
+        self.shown_lines = 0
+        self.paging_id = None
+
+    def _next_color_tag(self) -> str:
+        """Return the next cycling color tag."""
+        tag = f'color_{self.color_index}'
+        self.color_index = (self.color_index + 1) % len(self.response_colors)
+        return tag
 
     def display(self, text: str, is_error: bool = False) -> None:
         """Display text in the output area with cycling colors or error styling."""
+        self._follow_tail()
         self.output.config(state=tk.NORMAL)
-        if is_error:
-            tag = 'error'
-        else:
-            tag = f'color_{self.color_index}'
-            self.output.tag_config(tag, foreground=self.response_colors[self.color_index])
-            self.color_index = (self.color_index + 1) % len(self.response_colors)
+        tag = 'error' if is_error else self._next_color_tag()
         
         self.output.insert(tk.END, text + "\n", tag)
+        self._record_block(tag, text + "\n")
+        self.output.see(tk.END)
+        self.output.config(state=tk.DISABLED)
+
+    def begin_stream(self) -> None:
+        """Start a streamed response that shares one cycling color tag."""
+        self._follow_tail()
+        self.stream_tag = self._next_color_tag()
+        self.stream_buffer = []
+        self.stream_text = []
+        self.stream_render_s = 0.0
+
+    def append_stream(self, chunk: str) -> None:
+        """Buffer a streamed chunk; the widget is redrawn at most every stream_flush_ms."""
+        self.stream_buffer.append(chunk)
+        if self.stream_flush_id is None:
+            self.stream_flush_id = self.root.after(self.stream_flush_ms, self._flush_stream)
+
+    def end_stream(self) -> None:
+        """Flush any buffered chunks and terminate the streamed response."""
+        if self.stream_flush_id is not None:
+            self.root.after_cancel(self.stream_flush_id)
+        self.stream_buffer.append("\n")
+        self._flush_stream()
+        self.output.config(state=tk.NORMAL)
+        self._record_block(self.stream_tag or 'normal', ''.join(self.stream_text))
+        self.output.config(state=tk.DISABLED)
+        self.stream_tag = None
+        self.stream_text = []
+
+    def _flush_stream(self) -> None:
+        """Insert all buffered chunks in a single widget update."""
+        self.stream_flush_id = None
+        if not self.stream_buffer:
+            return
+        started = time.perf_counter()
+        text = ''.join(self.stream_buffer)
+        self.stream_buffer = []
+        self.stream_text.append(text)
+        self.output.config(state=tk.NORMAL)
+        self.output.insert(tk.END, text, self.stream_tag or 'normal')
+        self.output.see(tk.END)
+        self.output.config(state=tk.DISABLED)
+        self.stream_render_s += time.perf_counter() - started
+
+    def _record_block(self, tag: str, text: str) -> None:
+        """Log a block that was just inserted at the end and trim the oldest shown blocks."""
+        self.last_block = self.scrollback.append(tag, text) + 1
+        self.block_lines.append(text.count("\n"))
+        self.shown_lines += self.block_lines[-1]
+        self._trim_top()
+
+    def _trim_top(self) -> int:
+        """Remove the oldest shown blocks beyond scrollback_lines; return the lines removed."""
+        removed = 0
+        while self.shown_lines - removed > self.scrollback_lines and len(self.block_lines) > 1:
+            removed += self.block_lines.popleft()
+            self.first_block += 1
+        if removed:
+            self.output.delete("1.0", f"{removed + 1}.0")
+            self.shown_lines -= removed
+        return removed
+
+    def _trim_bottom(self) -> None:
+        """Remove the newest shown blocks beyond scrollback_lines."""
+        removed = 0
+        while self.shown_lines - removed > self.scrollback_lines and len(self.block_lines) > 1:
+            removed += self.block_lines.pop()
+            self.last_block -= 1
+        if removed:
+            end = int(self.output.index("end-1c").split('.')[0])
+            self.output.delete(f"{end - removed}.0", f"{end}.0")
+            self.shown_lines -= removed
+
+    def _insert_blocks(self, index: str, blocks: List) -> int:
+        """Insert logged (tag, text) blocks at index; return the lines inserted."""
+        lines = 0
+        for tag, text in reversed(blocks) if index == "1.0" else blocks:
+            self.output.insert(index, text, tag)
+            lines += text.count("\n")
+        return lines
+
+    def _on_scroll(self, first: str, last: str) -> None:
+        """Update the scrollbar and page logged output in when the view reaches either end."""
+        self.scrollbar.set(first, last)
+        if self.paging_id is not None or self.stream_tag or self.loading:
+            return
+        if float(first) <= 0.0 and self.first_block > 0:
+            self.paging_id = self.root.after_idle(self._page_older)
+        elif float(last) >= 1.0 and self.last_block < len(self.scrollback):
+            self.paging_id = self.root.after_idle(self._page_newer)
+
+    def _page_older(self) -> None:
+        """Page the previous blocks in from the scrollback log above the current view."""
+        self.paging_id = None
+        start = max(0, self.first_block - self.page_blocks)
+        blocks = self.scrollback.read(start, self.first_block)
+        top = int(self.output.index("@0,0").split('.')[0])
+        self.output.config(state=tk.NORMAL)
+        added = self._insert_blocks("1.0", blocks)
+        self.block_lines.extendleft(text.count("\n") for _, text in reversed(blocks))
+        self.shown_lines += added
+        self.first_block = start
+        self._trim_bottom()
+        self.output.config(state=tk.DISABLED)
+        self.output.yview(f"{top + added}.0")
+
+    def _page_newer(self) -> None:
+        """Page the following blocks in from the scrollback log below the current view."""
+        self.paging_id = None
+        stop = min(len(self.scrollback), self.last_block + self.page_blocks)
+        blocks = self.scrollback.read(self.last_block, stop)
+        top = int(self.output.index("@0,0").split('.')[0])
+        self.output.config(state=tk.NORMAL)
+        self.shown_lines += self._insert_blocks(tk.END, blocks)
+        self.block_lines.extend(text.count("\n") for _, text in blocks)
+        self.last_block = stop
+        removed = self._trim_top()
+        self.output.config(state=tk.DISABLED)
+        self.output.yview(f"{max(1, top - removed)}.0")
+
+    def _follow_tail(self) -> None:
+        """If older output is paged in, show the newest blocks again before writing more."""
+        if self.last_block >= len(self.scrollback):
+            return
+        self.first_block = self.last_block = len(self.scrollback)
+        self.block_lines.clear()
+        self.shown_lines = 0
+        self.output.config(state=tk.NORMAL)
+        self.output.delete("1.0", tk.END)
+        while self.first_block > 0 and self.shown_lines < self.scrollback_lines:
+            start = max(0, self.first_block - self.page_blocks)
+            blocks = self.scrollback.read(start, self.first_block)
+            self.shown_lines += self._insert_blocks("1.0", blocks)
+            self.block_lines.extendleft(text.count("\n") for _, text in reversed(blocks))
+            self.first_block = start
+        self._trim_top()
         self.output.see(tk.END)
         self.output.config(state=tk.DISABLED)
 
+    def close(self) -> None:
+        """Close the scrollback log."""
+        self.scrollback.close()
+
     def update_state_label(self, state_text: str) -> None:
         """Update the state display with formatted text."""
         self.state_text.config(state=tk.NORMAL)
@@ -93,14 +276,45 @@ class GameGUI:
         self.state_text.insert(tk.END, state_text)
         self.state_text.config(state=tk.DISABLED)
 
+    def update_state_sections(self, sections: Dict[str, str]) -> None:
+        """Re-render only the given state sections, leaving the rest of the panel untouched."""
+        if not sections:
+            return
+        self.state_text.config(state=tk.NORMAL)
+        for key, text in sections.items():
+            tag = f'state_{key}'
+            ranges = self.state_text.tag_ranges(tag)
+            if ranges:
+                start, end = ranges[0], ranges[-1]
+                if self.state_text.get(start, end) == text + "\n":
+                    continue
+                self.state_text.delete(start, end)
+                if text:
+                    self.state_text.insert(start, text + "\n", tag)
+            elif text:
+                self.state_text.insert(tk.END, text + "\n", tag)
+        self.state_text.config(state=tk.DISABLED)
+
+    def toggle_hud(self, event=None) -> None:
+        """Show or hide the metrics HUD."""
+        self.hud_visible = not self.hud_visible
+        if self.hud_visible:
+            self.hud_label.pack(fill=tk.X, padx=5)
+        else:
+            self.hud_label.pack_forget()
+
+    def set_hud(self, text: str) -> None:
+        """Replace the HUD text; cheap enough to call every turn even while hidden."""
+        self.hud_label.config(text=text)
+
     def show_error(self, message: str) -> None:
         """Display a temporary error message."""
         self.error_label.config(text=message)
         self.root.after(3000, lambda: self.error_label.config(text=""))
 
-    def _handle_input(self, event: tk.Event, callback: Callable[[tk.Event], None]) -> None:
-        """Handle Enter key press, show loading animation, and process input."""
-        if self.loading:  # Prevent multiple submissions
+    def _handle_input(self, event: tk.Event, callback: Callable[[str], None]) -> None:
+        """Handle Enter key press, show loading animation, and hand the command to the engine."""
+        if self.loading or self.busy:  # Prevent multiple submissions
             return
 
         command = self.input_field.get().strip()
@@ -112,11 +326,13 @@ class GameGUI:
         self.input_field.delete(0, tk.END)
 
         self.loading = True
+        self.busy = True
         self._start_loading_animation()
-        self.root.after(1000, lambda: self._process_input(event, callback))  # Simulate processing delay
+        callback(command)  # The engine runs the turn in the background and calls accept_input()
 
     def _start_loading_animation(self) -> None:
         """Start the loading animation with cycling dots."""
+        self._follow_tail()
         self.output.config(state=tk.NORMAL)
         self.output.insert(tk.END, "Loading", 'loading')
         self.output.see(tk.END)
@@ -137,15 +353,22 @@ class GameGUI:
 
         self.loading_id = self.root.after(200, lambda: self._animate_loading_dots(dot_count + 1))
 
-    def _process_input(self, event: tk.Event, callback: Callable[[tk.Event], None]) -> None:
-        """Process the input and stop the loading animation."""
+    def finish_loading(self) -> None:
+        """Stop the loading animation."""
+        if not self.loading:
+            return
         self.loading = False
         if self.loading_id:
             self.root.after_cancel(self.loading_id)
+            self.loading_id = None
         self.output.config(state=tk.NORMAL)
         self.output.delete("end-2l", "end-1l")  # Remove loading text
         self.output.config(state=tk.DISABLED)
-        callback(event)  # Call the original processing function
+
+    def accept_input(self) -> None:
+        """Stop any loading animation and allow the next submission."""
+        self.finish_loading()
+        self.busy = False
 
     def _prev_history(self, event=None) -> None:
         """Navigate up through command history."""
@@ -0,0 +1,291 @@
+# game_session.py
+import os
+import copy
+import time
+import logging
+from dataclasses import dataclass, field
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+from dotenv import load_dotenv
+from game_state import GameState
+from narrative_model import MainNarrativeModel
+from state_update_model import StateUpdateModel
+from context_window import ContextWindow
+from response_cache import ResponseCache
+from llm_backend import LLMBackend
+from monitor_models import MonitorRegistry
+from save_journal import SaveJournal
+from world_generation import WorldGenerator
+from metrics import MetricsLog, TurnMetrics
+from command_interpreter import CommandInterpreter
+
+# Load environment variables (e.g., OPENAI_API_KEY)
+load_dotenv()
+
+api_key = os.getenv("OPENAI_API_KEY")
+cache_dir = os.getenv("RESPONSE_CACHE_DIR")  # Optional on-disk response cache
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Turn:
+    """A turn in progress. Created by GameSession.begin_turn and filled in as it runs."""
+    seq: int
+    user_input: str
+    game_state: GameState  # Snapshot the turn's model calls read from
+    history: List[Dict]
+    world_context: str = ""  # Pre-generated locations around the player, for the prompts
+    started: float = field(default_factory=time.perf_counter)
+    narrative: str = ""
+    updates: Dict = field(default_factory=dict)
+    error: Optional[str] = None
+    applied_keys: Set[str] = field(default_factory=set)  # Keys already applied while streaming
+    local: bool = False  # Answered by the command interpreter without model calls
+    metrics: TurnMetrics = field(default_factory=TurnMetrics)
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        return self.metrics.spans
+
+@dataclass
+class TurnResult:
+    """The outcome of a finished turn."""
+    seq: int
+    user_input: str
+    narrative: str
+    updates: Dict
+    error: Optional[str]
+    applied: bool  # False if the updates were stale or failed
+    timings: Dict[str, float]
+    usage: Dict[str, int] = field(default_factory=dict)
+
+class GameSession:
+    def __init__(self, initial_state: Dict, system_prompt_narrative: str, system_prompt_updates: str, monitors: List['MonitorModel'],
+                 initial_message: Optional[str] = None, context_token_budget: int = 3000, summary_interval: int = 10,
+                 response_cache: Optional[ResponseCache] = None, backend: Optional[LLMBackend] = None,
+                 structured_output: bool = True, journal: Optional[SaveJournal] = None, world_generation: bool = False,
+                 max_turn_timings: int = 1000, metrics_log: Optional[MetricsLog] = None, local_commands: bool = True,
+                 restore_dir: Optional[str] = None):
+        """
+        UI-agnostic game session: one player's state, history and turn logic.
+
+        submit() plays a whole turn. Frontends that run model calls in the background
+        use the individual steps instead: begin_turn and finish_turn on their own
+        thread, narrate and extract_updates on a worker.
+
+        With a journal, every finished turn is saved in the background; pass
+        restore_dir (or call restore() first) to resume from the journal's directory.
+        With world_generation, locations around the player are generated in the
+        background; call close() when done. With a metrics_log, each turn's timing
+        spans and token usage are written to it when the turn finishes. With
+        local_commands, try_local() answers simple commands (inventory, look, drop,
+        move...) from the state without model calls.
+        """
+        self.game_state = GameState(copy.deepcopy(initial_state))
+        self.response_cache = response_cache or ResponseCache(cache_dir=cache_dir)
+        self.narrative_model = MainNarrativeModel(api_key, system_prompt=system_prompt_narrative, cache=self.response_cache, backend=backend)
+        self.monitors = monitors if isinstance(monitors, MonitorRegistry) else MonitorRegistry(monitors)
+        update_keys = self.monitors.keys() if structured_output else None
+        self.state_update_model = StateUpdateModel(api_key, system_prompt=system_prompt_updates, cache=self.response_cache,
+                                                   backend=backend, update_keys=update_keys)
+        self.history = ContextWindow(token_budget=context_token_budget, summary_interval=summary_interval)
+        self.initial_message = initial_message
+        self.journal = journal
+        self.metrics_log = metrics_log
+        self.interpreter = CommandInterpreter() if local_commands else None
+        # Entered rooms are only kept for the journal, so sessions that don't save don't accumulate them
+        self.world = WorldGenerator(api_key, backend=backend, track_installed=journal is not None) if world_generation else None
+        if self.world:
+            self.monitors.add_post_apply_hook(self.world.on_state_applied)
+
+        # Turn bookkeeping: sequence numbers keep stale updates from overwriting newer ones
+        self.turn_seq = 0
+        self.applied_seq = 0
+        self.in_flight: Set[int] = set()  # Model turns begun but not yet finished or cancelled
+        self.snapshot_seq = 0  # Turn of the latest save snapshot
+        self.turn_timings: Deque[Dict] = deque(maxlen=max_turn_timings)  # Most recent turns only
+
+        if self.initial_message:
+            self.history.append({"role": "assistant", "content": self.initial_message})
+        if restore_dir:
+            self.restore(restore_dir)  # Prefetches around the restored position once replay is done
+        elif self.world:
+            self.world.prefetch(self.game_state)
+
+    def close(self) -> None:
+        """Stop background world generation."""
+        if self.world:
+            self.world.shutdown()
+
+    def restore(self, directory: str) -> int:
+        """
+        Load the latest snapshot and replay the journaled turns after it, without any LLM calls.
+
+        Post-apply hooks don't run during replay: rooms world generation installed
+        were journaled with their turn, so replay is deterministic.
+        """
+        snapshot, turns = SaveJournal.read(directory)
+        if snapshot:
+            self.game_state.replace_state(snapshot["state"])
+            self.history.restore(snapshot["history"])
+            self.turn_seq = self.snapshot_seq = snapshot["seq"]
+        for turn in turns:
+            self.monitors.update_state(turn["updates"], self.game_state, run_hooks=False)
+            self.history.append({"role": "user", "content": turn["input"]})
+            self.history.append({"role": "assistant", "content": turn["narrative"]})
+            self.turn_seq = max(self.turn_seq, turn["seq"])  # Turns are journaled in the order they finished
+        for key in self.game_state.state:
+            self.game_state.mark_dirty(key)
+        self.applied_seq = self.turn_seq
+        if self.world:
+            self.world.prefetch(self.game_state)
+        if snapshot or turns:
+            logger.info(f"Restored session at turn {self.turn_seq} ({len(turns)} turns replayed)")
+        return self.turn_seq
+
+    def submit(self, user_input: str, on_chunk: Optional[Callable[[str], None]] = None) -> TurnResult:
+        """Play a full turn: narrate, extract state updates and apply them."""
+        local = self.try_local(user_input)
+        if local:
+            return local
+        turn = self.begin_turn(user_input)
+        try:
+            self.narrate(turn, on_chunk)
+            self.record_narrative(turn)
+            self.extract_updates(turn, lambda key, value: self.apply_update(turn, key, value))
+        except Exception:
+            self.cancel_turn(turn)
+            raise
+        return self.finish_turn(turn)
+
+    def try_local(self, user_input: str) -> Optional[TurnResult]:
+        """
+        Play the turn with the command interpreter if it can answer it; return None otherwise.
+
+        Actions that change the state are only taken locally while no turn is in
+        flight, so they can't race a pending model update.
+        """
+        if not self.interpreter:
+            return None
+        started = time.perf_counter()
+        answer = self.interpreter.interpret(user_input, self.game_state, allow_actions=not self.in_flight)
+        if answer is None:
+            return None
+
+        self.turn_seq += 1
+        self.history.append({"role": "user", "content": user_input})
+        turn = Turn(self.turn_seq, user_input, self.game_state, [], started=started, narrative=answer.text,
+                    updates=answer.updates, local=True)
+        turn.metrics.add("local_s", time.perf_counter() - started)
+        self.record_narrative(turn)
+        logger.info(f"Answered '{answer.command}' locally (command interpreter: {self.interpreter.stats()})")
+        return self.finish_turn(turn)
+
+    def cancel_turn(self, turn: Turn) -> None:
+        """Mark a turn that failed before finish_turn as finished without applying anything."""
+        self.in_flight.discard(turn.seq)
+
+    def begin_turn(self, user_input: str) -> Turn:
+        """Record the player's input and snapshot what the turn's model calls will read."""
+        self.turn_seq += 1
+        self.in_flight.add(self.turn_seq)
+        self.history.append({"role": "user", "content": user_input})
+        # Model calls get a snapshot so monitors applying an older turn can't change state under them
+        snapshot = self.game_state.snapshot()
+        history = self.history.window()
+        world_context = self.world.prompt_context(self.game_state) if self.world else ""
+        if world_context:
+            history.append({"role": "system", "content": world_context})
+        return Turn(self.turn_seq, user_input, snapshot, history, world_context)
+
+    def narrate(self, turn: Turn, on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        """Generate the turn's narrative, streaming chunks to on_chunk if given. Safe to run on a worker."""
+        if on_chunk is None:
+            turn.narrative = self.narrative_model.generate_narrative(turn.user_input, turn.game_state, turn.history,
+                                                                     turn.metrics)
+        else:
+            chunks: List[str] = []
+            for chunk in self.narrative_model.stream_narrative(turn.user_input, turn.game_state, turn.history,
+                                                               turn.metrics):
+                chunks.append(chunk)
+                on_chunk(chunk)
+            turn.narrative = ''.join(chunks)
+        turn.timings["narrative_s"] = time.perf_counter() - turn.started
+        return turn.narrative
+
+    def record_narrative(self, turn: Turn) -> None:
+        """Add the turn's narrative to the history."""
+        self.history.append({"role": "assistant", "content": turn.narrative})
+
+    def extract_updates(self, turn: Turn, on_update: Optional[Callable[[str, Any], None]] = None) -> None:
+        """
+        Ask the state update model for the turn's updates. Safe to run on a worker.
+
+        With on_update, the response is streamed and each update is handed over as soon
+        as it is complete; pass it to apply_update on the thread that owns the state.
+        """
+        turn.updates, turn.error = self.state_update_model.analyze_narrative(turn.user_input, turn.narrative,
+                                                                             turn.game_state, on_update, turn.world_context,
+                                                                             turn.metrics)
+        if self.history.summary_due():
+            with turn.metrics.span("summary_s"):
+                self.history.refresh_summary(self.narrative_model.summarize)
+
+    def apply_update(self, turn: Turn, key: str, value: Any) -> bool:
+        """Apply one streamed update for a turn unless a newer turn already applied."""
+        if turn.seq < self.applied_seq or key in turn.applied_keys:
+            return False
+        with turn.metrics.span("apply_s"):
+            self.monitors.update_state({key: value}, self.game_state)
+        turn.applied_keys.add(key)
+        self.applied_seq = turn.seq
+        return True
+
+    def finish_turn(self, turn: Turn, record: bool = True) -> TurnResult:
+        """
+        Apply the turn's remaining updates unless a newer turn already applied, and record its timing.
+
+        Frontends that time their own rendering pass record=False and call
+        record_metrics() once the turn is on screen.
+        """
+        applied = bool(turn.applied_keys)
+        if turn.error:
+            logger.warning(f"Turn {turn.seq} produced no updates: {turn.error}")
+        elif turn.seq < self.applied_seq:
+            logger.info(f"Dropped stale state update for turn {turn.seq} (turn {self.applied_seq} already applied)")
+        else:
+            remaining = {key: value for key, value in turn.updates.items() if key not in turn.applied_keys}
+            if remaining:  # A turn without updates doesn't make an older turn's pending updates stale
+                with turn.metrics.span("apply_s"):
+                    self.monitors.update_state(remaining, self.game_state)
+                turn.applied_keys.update(remaining)
+                self.applied_seq = turn.seq
+            applied = True
+        self.in_flight.discard(turn.seq)
+
+        if self.journal:
+            applied_updates = {key: turn.updates[key] for key in turn.applied_keys if key in turn.updates}
+            installed = self.world.pop_installed() if self.world else {}
+            if installed:  # Pre-generated rooms entered this turn, so a restore doesn't need the generator
+                applied_updates["location"] = {**installed, **applied_updates.get("location", {})}
+            self.journal.record_turn(turn.seq, turn.user_input, turn.narrative, applied_updates)
+            # Turns finish out of order, so only snapshot once every begun turn has finished:
+            # a snapshot at turn_seq then covers every turn up to it
+            if not self.in_flight and self.journal.snapshot_due(self.turn_seq, self.snapshot_seq):
+                self.journal.snapshot(self.turn_seq, copy.deepcopy(self.game_state.state), self.history.export())
+                self.snapshot_seq = self.turn_seq
+
+        turn.timings["total_s"] = time.perf_counter() - turn.started
+        self.turn_timings.append({"seq": turn.seq, **turn.timings})
+        logger.info(f"Turn {turn.seq} finished in {turn.timings['total_s']:.2f}s (cache: {self.response_cache.stats()})")
+        if record:
+            self.record_metrics(turn)
+        return TurnResult(turn.seq, turn.user_input, turn.narrative, turn.updates, turn.error, applied,
+                          turn.timings, turn.metrics.usage)
+
+    def record_metrics(self, turn: Turn) -> None:
+        """Write the turn's spans and token usage to the metrics log, if there is one."""
+        logger.debug(f"Turn {turn.seq} metrics: {turn.metrics.to_dict()}")
+        if self.metrics_log:
+            self.metrics_log.record(turn.seq, turn.metrics, applied_keys=sorted(turn.applied_keys), error=turn.error,
+                                    local=turn.local)
@@ -1,25 +1,145 @@
 # game_state.py
+import copy
 import json
-from typing import Dict
+import hashlib
+from typing import Dict, Iterable, List, Optional, Set
+from spatial_index import SpatialIndex
 
 class GameState:
     def __init__(self, initial_state: Dict):
         """Initialize the game state with a dictionary."""
         self.state = initial_state
+        self.dirty: Set[str] = set()  # Keys changed since the display last rendered them
+        self._section_cache: Dict[str, str] = {}
+        self._spatial: Optional[SpatialIndex] = None
+
+    @property
+    def spatial(self) -> SpatialIndex:
+        """Spatial index over locations and the map, built on first use and kept current by the monitors."""
+        if self._spatial is None:
+            self._spatial = SpatialIndex.from_state(self.state)
+        return self._spatial
+
+    def snapshot(self) -> "GameState":
+        """Return an independent copy of the state, sharing nothing with this one."""
+        snapshot = GameState(copy.deepcopy(self.state))
+        snapshot._spatial = copy.deepcopy(self._spatial)
+        return snapshot
+
+    def replace_state(self, state: Dict) -> None:
+        """Swap in a whole new state (e.g. a loaded save), dropping everything derived from the old one."""
+        self.state = state
+        self._section_cache.clear()
+        self._spatial = None
+        self.dirty.update(state)
+
+    def mark_dirty(self, key: str) -> None:
+        """Record that a top-level key changed. Monitors call this after writing."""
+        self.dirty.add(key)
+        self._section_cache.pop(key, None)
+
+    def pop_dirty(self) -> Set[str]:
+        """Return and clear the set of keys changed since the last call."""
+        dirty, self.dirty = self.dirty, set()
+        return dirty
 
     def to_json(self) -> str:
         """Return the state as a JSON string."""
         return json.dumps(self.state, indent=2)
 
+    def state_hash(self) -> str:
+        """Return a stable hash of the full state, used to key cached responses."""
+        payload = json.dumps(self.state, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def format_section(self, key: str) -> str:
+        """Format one top-level key for display, reusing the cached text until it is marked dirty."""
+        if key in self._section_cache:
+            return self._section_cache[key]
+        if key not in self.state:
+            return ""
+
+        value = self.state[key]
+        if isinstance(value, list):
+            value_str = ', '.join(map(str, value)) if value else 'empty'
+        elif isinstance(value, dict):
+            value_str = json.dumps(value, indent=2)
+        else:
+            value_str = str(value)
+        section = f"{key}: {value_str}"
+        self._section_cache[key] = section
+        return section
+
+    def format_sections(self, keys: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Format the given keys (default: all) for display, keyed by state key."""
+        return {key: self.format_section(key) for key in (self.state if keys is None else keys)}
+
     def format_state(self) -> str:
         """Format the state for readable display in the GUI."""
-        lines = []
+        return '\n'.join(self.format_section(key) for key in self.state)
+
+    def current_rooms(self) -> List[str]:
+        """Return the names of locations at the player's current coordinates."""
+        coordinates = self.state.get("coordinates")
+        if not isinstance(coordinates, list) or len(coordinates) != 2:
+            return []
+        return self.spatial.rooms_at(coordinates)
+
+    def to_prompt_context(self, *texts: str) -> str:
+        """
+        Serialize only the state relevant to the given texts (player input, narrative).
+
+        Scalars and the inventory are always included, along with the current and
+        neighbouring locations, any location, limb, armor piece, skill or character
+        mentioned in the texts, and anything not in its default condition. Everything
+        else is summarized by name so the model knows it exists and is left unchanged
+        unless it returns an update. The player's exits and routes to mentioned
+        locations come from the spatial index rather than the model working them out.
+        """
+        mentioned = ' '.join(texts).lower()
+
+        def is_mentioned(name: str) -> bool:
+            return bool(name) and (name.lower() in mentioned or name.replace('_', ' ').lower() in mentioned)
+
+        coordinates = self.state.get("coordinates")
+        located = isinstance(coordinates, list) and len(coordinates) == 2
+        nearby: Set[str] = set(self.current_rooms())
+        if located:
+            for rooms in self.spatial.neighbours(coordinates).values():
+                nearby.update(rooms)
+
+        relevant: Dict = {}
+        omitted: List[str] = []
+        destinations: List[str] = []
         for key, value in self.state.items():
-            if isinstance(value, list):
-                value_str = ', '.join(map(str, value)) if value else 'empty'
-            elif isinstance(value, dict):
-                value_str = json.dumps(value, indent=2)
+            if not isinstance(value, dict):
+                relevant[key] = value
+                continue
+
+            if key == "location":
+                destinations = [name for name in value if is_mentioned(name)]
+                keep: Set[str] = nearby.union(destinations)
+            elif key == "map":
+                rooms = set(self.current_rooms())
+                keep = {region for region, region_rooms in value.items()
+                        if is_mentioned(region) or rooms.intersection(region_rooms)}
+            elif key in ("limb", "armor"):
+                keep = {name for name, part in value.items()
+                        if is_mentioned(name) or (isinstance(part, dict) and (
+                            part.get("status") not in ("healthy", "perfect") or part.get("holding", "nothing") != "nothing"))}
+                keep.update(name for name, part in value.items()
+                            if isinstance(part, dict) and is_mentioned(str(part.get("name", ""))))
             else:
-                value_str = str(value)
-            lines.append(f"{key}: {value_str}")
-        return '\n'.join(lines)
\ No newline at end of file
+                keep = {name for name in value if is_mentioned(name)}
+
+            relevant[key] = {name: value[name] for name in value if name in keep}
+            rest = [name for name in value if name not in keep]
+            if rest:
+                omitted.append(f"{key}: {', '.join(rest)}")
+
+        context = json.dumps(relevant, separators=(',', ':'))
+        if located:
+            context += "\n" + self.spatial.describe(coordinates, destinations)
+        if omitted:
+            context += "\nOmitted (unchanged unless you return an update): " + '; '.join(omitted)
+        return context
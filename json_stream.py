@@ -0,0 +1,126 @@
+# json_stream.py
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class StreamingJSONParser:
+    def __init__(self):
+        """
+        Tolerant incremental parser for a single JSON object arriving in chunks.
+
+        Text before the object (prose, code fences, stray braces) and after its
+        closing "}" is ignored. Each top-level member is returned from feed() as soon as its value
+        is complete, and result() recovers what it can from a truncated object.
+        """
+        self.text = ""
+        self.pos = 0
+        self.started = False
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.object_start = 0
+        self.member_start = 0
+        self.members: Dict[str, Any] = {}
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk and return the top-level (key, value) pairs it completed."""
+        self.text += chunk
+        completed: List[Tuple[str, Any]] = []
+        while self.pos < len(self.text) and not self.done:
+            ch = self.text[self.pos]
+            if not self.started:
+                if ch == '{':
+                    # Only a "{" followed by a key or "}" opens the object; braces in prose are skipped
+                    following = self.text[self.pos + 1:].lstrip()
+                    if not following:
+                        break  # Decide once the next chunk arrives
+                    if following[0] in '"}':
+                        self.started = True
+                        self.depth = 1
+                        self.object_start = self.member_start = self.pos + 1
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                self.depth += 1
+            elif ch in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    completed += self._close_member(self.pos)
+                    # A braced phrase in prose ({"like this"}) yields nothing: keep looking for the object
+                    self.done = bool(self.members) or not self.text[self.object_start:self.pos].strip()
+                    self.started = self.done
+            elif ch == ',' and self.depth == 1:
+                completed += self._close_member(self.pos)
+                self.member_start = self.pos + 1
+            self.pos += 1
+        return completed
+
+    def _close_member(self, end: int) -> List[Tuple[str, Any]]:
+        """Parse the member text between member_start and end."""
+        member = self.text[self.member_start:end].strip()
+        if not member:
+            return []
+        try:
+            parsed = json.loads('{' + member + '}')
+        except ValueError:
+            logger.warning(f"Skipping malformed JSON member: {member[:80]}")
+            return []
+        self.members.update(parsed)
+        return list(parsed.items())
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """
+        Return every member recovered so far, or None if no object was found.
+
+        If the object was cut off, the trailing member is closed (open string,
+        brackets) and kept when that makes it valid JSON.
+        """
+        if not self.started:
+            return None
+        if not self.done:
+            recovered = self._recover_tail(self.text[self.member_start:])
+            if recovered:
+                self.members.update(recovered)
+        return self.members
+
+    @staticmethod
+    def _recover_tail(tail: str) -> Optional[Dict[str, Any]]:
+        """Try to close a truncated trailing member."""
+        stack: List[str] = []
+        in_string = escape = False
+        for ch in tail:
+            if in_string:
+                if escape:
+                    escape = False
+                elif ch == '\\':
+                    escape = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch in '{[':
+                stack.append('}' if ch == '{' else ']')
+            elif ch in '}]' and stack:
+                stack.pop()
+        closed = tail.rstrip().rstrip(',') + ('"' if in_string else '') + ''.join(reversed(stack))
+        try:
+            parsed = json.loads('{' + closed + '}')
+        except ValueError:
+            return None
+        return parsed if isinstance(parsed, dict) else None
+
+def parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Parse a JSON object from model output, tolerating surrounding prose, code fences and truncation."""
+    parser = StreamingJSONParser()
+    parser.feed(text)
+    return parser.result()
@@ -0,0 +1,157 @@
+# llm_backend.py
+import json
+import time
+import threading
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Union
+
+class LLMBackend(ABC):
+    """Chat-completion backend used by the narrative and state update models."""
+
+    @abstractmethod
+    def create(self, **kwargs: Any) -> Any:
+        """Return a completion shaped like an OpenAI ChatCompletion."""
+        pass
+
+    @abstractmethod
+    def stream(self, **kwargs: Any) -> Iterator[Any]:
+        """Yield completion chunks shaped like OpenAI ChatCompletionChunks."""
+        pass
+
+def _usage(prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> SimpleNamespace:
+    """Build a CompletionUsage-like object."""
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           total_tokens=prompt_tokens + completion_tokens,
+                           prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens))
+
+def _completion(text: str, usage: SimpleNamespace) -> SimpleNamespace:
+    """Build a ChatCompletion-like object."""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=text), finish_reason="stop")],
+        usage=usage,
+    )
+
+def _chunk(text: Optional[str], usage: Optional[SimpleNamespace] = None) -> SimpleNamespace:
+    """Build a ChatCompletionChunk-like object."""
+    choices = [] if text is None else [SimpleNamespace(delta=SimpleNamespace(content=text), finish_reason=None)]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+class MockBackend(LLMBackend):
+    def __init__(self, latency: float = 0.0, first_token_latency: float = 0.0, chunk_words: int = 3,
+                 narrative_words: int = 60, updates: Optional[Union[List[Dict], Callable[[int, str], Dict]]] = None):
+        """
+        Deterministic local stand-in for the OpenAI API.
+
+        :param latency: Simulated seconds per request (spread across chunks when streaming).
+        :param first_token_latency: Simulated seconds before the first chunk or response.
+        :param chunk_words: Words per streamed chunk.
+        :param narrative_words: Length of generated narratives.
+        :param updates: State updates to return, either a list cycled per call or
+                        a function of (call number, player input) returning a dict.
+        """
+        self.latency = latency
+        self.first_token_latency = first_token_latency
+        self.chunk_words = chunk_words
+        self.narrative_words = narrative_words
+        self.updates = updates
+        self.calls = 0
+        self.update_calls = 0
+        self._seen_prefixes: Set[int] = set()  # Hashes of message prefixes already sent, for simulated prompt caching
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _player_input(messages: List[Dict]) -> str:
+        """Find the player's input in a narrative or state update request."""
+        for message in reversed(messages):
+            content = message.get("content", "")
+            if "Player Input:" in content:
+                return content.split("Player Input:", 1)[1].split("\n", 1)[0].strip()
+            if message.get("role") == "user":
+                return content
+        return ""
+
+    @staticmethod
+    def _world_coordinates(messages: List[Dict]) -> Optional[List[List[int]]]:
+        """Coordinates requested by a world generation request, or None for other requests."""
+        for message in messages:
+            content = message.get("content", "")
+            if "Coordinates to generate:" in content:
+                return json.loads(content.split("Coordinates to generate:", 1)[1].split("\n", 1)[0])
+        return None
+
+    @staticmethod
+    def _is_state_update(messages: List[Dict]) -> bool:
+        return any("Narrative:" in message.get("content", "") for message in messages)
+
+    def _respond(self, messages: List[Dict]) -> str:
+        """Produce the deterministic response text for a request."""
+        with self._lock:
+            self.calls += 1
+            is_update = self._is_state_update(messages)
+            if is_update:
+                self.update_calls += 1
+            update_number = self.update_calls
+
+        world_coordinates = self._world_coordinates(messages)
+        if world_coordinates is not None:
+            return json.dumps({f"Wasteland {x},{y}": {"coordinates": [x, y], "description": f"Ruins at {x},{y}",
+                                                      "objects": ["Rubble"]} for x, y in world_coordinates})
+
+        player_input = self._player_input(messages)
+        if is_update:
+            if callable(self.updates):
+                updates = self.updates(update_number, player_input)
+            elif self.updates:
+                updates = self.updates[(update_number - 1) % len(self.updates)]
+            else:
+                updates = {}
+            return json.dumps(updates)
+
+        words = f"You {player_input or 'wait'}. The wasteland stirs around you.".split()
+        filler = "Dust drifts across the cracked floor as distant machinery hums.".split()
+        while len(words) < self.narrative_words:
+            words.extend(filler)
+        return ' '.join(words[:self.narrative_words])
+
+    @staticmethod
+    def _prompt_tokens(messages: List[Dict]) -> int:
+        return sum(len(message.get("content", "")) // 4 for message in messages)
+
+    def _usage(self, messages: List[Dict], text: str) -> SimpleNamespace:
+        """
+        Usage for a request. Leading messages identical to an earlier request's count as
+        cached prompt tokens, like a provider's prefix cache (without its minimum length).
+        """
+        cached = 0
+        prefix = 0
+        hit = True
+        with self._lock:
+            for message in messages:
+                prefix = hash((prefix, message.get("role"), message.get("content", "")))
+                if hit and prefix in self._seen_prefixes:
+                    cached += len(message.get("content", "")) // 4
+                else:
+                    hit = False
+                    self._seen_prefixes.add(prefix)
+        return _usage(self._prompt_tokens(messages), len(text) // 4, cached)
+
+    def create(self, **kwargs: Any) -> Any:
+        """Return a full completion after the simulated latency."""
+        messages = kwargs.get("messages", [])
+        text = self._respond(messages)
+        time.sleep(self.first_token_latency + self.latency)
+        return _completion(text, self._usage(messages, text))
+
+    def stream(self, **kwargs: Any) -> Iterator[Any]:
+        """Yield the completion in word chunks, spreading the simulated latency across them."""
+        messages = kwargs.get("messages", [])
+        text = self._respond(messages)
+        words = text.split(' ')
+        pieces = [' '.join(words[i:i + self.chunk_words]) for i in range(0, len(words), self.chunk_words)]
+        time.sleep(self.first_token_latency)
+        for index, piece in enumerate(pieces):
+            if self.latency:
+                time.sleep(self.latency / len(pieces))
+            yield _chunk(piece if index == 0 else ' ' + piece)
+        yield _chunk(None, usage=self._usage(messages, text))
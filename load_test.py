@@ -0,0 +1,72 @@
+# load_test.py
+"""
+Load test for the session server against the local mock backend.
+
+Starts a SessionServer in-process, connects many clients that each play a
+scripted session, and reports turn throughput, latency percentiles and
+peak queue depth.
+
+    python load_test.py --clients 200 --turns 10 --latency 0.2 --concurrency 32
+"""
+import json
+import time
+import asyncio
+import argparse
+from typing import List
+from session_server import SessionServer, make_session_factory
+from llm_backend import MockBackend
+from benchmark import SCRIPT, percentile, scripted_updates
+
+async def play(host: str, port: int, turns: int, latencies: List[float]) -> None:
+    """Connect one client and play a scripted session."""
+    reader, writer = await asyncio.open_connection(host, port)
+    await reader.readline()  # Welcome message
+    for turn in range(turns):
+        started = time.perf_counter()
+        writer.write((SCRIPT[turn % len(SCRIPT)] + "\n").encode("utf-8"))
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        if response.get("type") == "turn":
+            latencies.append(time.perf_counter() - started)
+    writer.write(b"/quit\n")
+    await writer.drain()
+    writer.close()
+
+async def run(clients: int, turns: int, latency: float, concurrency: int) -> None:
+    """Run the server and clients, then print a report."""
+    backend = MockBackend(latency=latency, first_token_latency=latency / 4, updates=scripted_updates)
+    server = SessionServer(make_session_factory(backend), max_concurrency=concurrency, stats_interval=0)
+    ready = asyncio.Event()
+    server_task = asyncio.create_task(server.serve("127.0.0.1", 0, ready))
+    await ready.wait()
+    host, port = server.address[:2]
+
+    peak_queue = 0
+
+    async def sample_queue() -> None:
+        nonlocal peak_queue
+        while True:
+            peak_queue = max(peak_queue, server.queue_depth())
+            await asyncio.sleep(0.05)
+
+    latencies: List[float] = []
+    sampler = asyncio.create_task(sample_queue())
+    started = time.perf_counter()
+    await asyncio.gather(*(play(host, port, turns, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    server_task.cancel()
+
+    print(f"{clients} clients x {turns} turns in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.1f} turns/s, {clients / elapsed:.1f} sessions/s)")
+    print(f"turn latency p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, peak queue depth {peak_queue}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the session server against the mock backend.")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated seconds per model call.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Maximum turns in flight on the server.")
+    args = parser.parse_args()
+    asyncio.run(run(args.clients, args.turns, args.latency, args.concurrency))
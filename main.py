@@ -1,5 +1,7 @@
 # main.py
+import os
 import logging
+import argparse
 from game_engine import GameEngine
 from monitor_models import * # Import all monitors
 
@@ -17,12 +19,13 @@ IF AN ITEM THE USER MENTIONS ISN'T IN THE GAME, DO NOT ALLOW THE USER TO SPAWN I
 "I drop the coin" - "You search your inventory but don't see a coin"
 
 
-"inventory": List[str] - List of items in the inventory.
-"location": Dict[str, Dict[str, str]] - Current location and its shortened description. GENERATE ADDITIONAL LOCATIONS BASED ON THE USER'S INPUT.
+"inventory": List[str] - List of items in the inventory. To change a few items, return {"add": [...], "remove": [...]} instead of the full list.
+"location": Dict[str, Dict[str, str]] - Locations keyed by name: {"coordinates": [x, y], "description": str, "objects": List[str]}. Only return new or changed locations. GENERATE ADDITIONAL LOCATIONS BASED ON THE USER'S INPUT.
+"coordinates": [x, y] - The player's current coordinates. UPDATE THIS WHENEVER THE PLAYER MOVES; if a pre-generated location exists at the new coordinates, use it instead of inventing one.
 "health": int - Current health level.
 "skill": Dict[str, int] - Skill levels.
 "limb": Dict[str, Dict[str, int]] - Limb states. {"left_leg": {"hp": 100, "status": "(healthy|injured|decapitated|amputated|broken|fractured|)"}}
-"map": Dict[str, List[str]] - Map of locations and their connections. ADD LOCATIONS TO THE MAP AS THE USER EXPLORES THE GAME WORLD.
+"map": Dict[str, List[str]] - Map regions and the locations they connect. Only return new or changed regions. ADD LOCATIONS TO THE MAP AS THE USER EXPLORES THE GAME WORLD.
 "time": str - Current time. (UPDATE THIS EVERY INTERACTION)
 "relationships": Dict[str, int] (-100: Hostile, 0: Neutral, 100: Friendly) - Updated relationship scores with characters, reflecting changes in their perception of the player based on actions and narrative events.
 "armor": Dict[str, Dict[str, int]] - Armor states. {"head": {"name": "knight helmet", "hp": 100, "status": "(perfect|good|damaged|destroyed|)"}}
@@ -93,6 +96,8 @@ INITIAL_STATE = {
 MONITORS = [
     GenericMonitor("inventory", update_inventory),
     GenericMonitor("location", update_location),
+    GenericMonitor("coordinates", update_coordinates),
+    GenericMonitor("map", update_map),
     GenericMonitor("health", update_health),
     GenericMonitor("limb", update_limbs),
     GenericMonitor("skill", update_skill),
@@ -106,6 +111,13 @@ INITIAL_MESSAGE = "You find yourself in New Vegas. A once prosperous city, now a
 
 # Main execution block
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play the game; resumes the save in SAVE_DIR if there is one.")
+    parser.add_argument("--new", action="store_true", default=os.getenv("NEW_GAME", "0") == "1",
+                        help="Start a new game, archiving the existing save (also NEW_GAME=1).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     try:
         # Initialize and run the game
         game = GameEngine(
@@ -113,7 +125,11 @@ if __name__ == "__main__":
             system_prompt_narrative=SYSTEM_PROMPT_NARRATIVE,
             system_prompt_updates=SYSTEM_PROMPT_UPDATES,
             monitors=MONITORS,
-            initial_message=INITIAL_MESSAGE
+            initial_message=INITIAL_MESSAGE,
+            save_dir=os.getenv("SAVE_DIR", "saves/default"),
+            metrics_path=os.getenv("METRICS_FILE", "saves/metrics.jsonl"),
+            show_hud=os.getenv("SHOW_HUD", "0") == "1",
+            new_game=args.new
         )
         logging.info("Game started successfully.")
         game.run()
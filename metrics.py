@@ -0,0 +1,78 @@
+# metrics.py
+import os
+import json
+import time
+import logging
+import logging.handlers
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class TurnMetrics:
+    """Timing spans (seconds) and token usage collected while a turn runs."""
+    spans: Dict[str, float] = field(default_factory=dict)
+    usage: Dict[str, int] = field(default_factory=dict)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a block; repeated spans with the same name accumulate."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def add_usage(self, prefix: str, usage: Any) -> None:
+        """Add an API response's token usage under prefix (e.g. "narrative"), including prefix-cached prompt tokens."""
+        if usage is None:
+            return
+        counts = {name: getattr(usage, name, 0) or 0 for name in ("prompt_tokens", "completion_tokens", "total_tokens")}
+        counts["cached_tokens"] = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0
+        for name, count in counts.items():
+            self.usage[f"{prefix}_{name}"] = self.usage.get(f"{prefix}_{name}", 0) + count
+        logger.info(f"{prefix} call: {counts['prompt_tokens']} prompt tokens ({counts['cached_tokens']} cached), "
+                    f"{counts['completion_tokens']} completion tokens")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"spans_ms": {name.removesuffix('_s'): round(seconds * 1000, 3) for name, seconds in self.spans.items()},
+                "usage": dict(self.usage)}
+
+class MetricsLog:
+    def __init__(self, path: str, max_bytes: int = 5 * 1024 * 1024, backups: int = 3):
+        """
+        Rotating JSONL file of per-turn metrics, one object per line.
+
+        :param max_bytes: Size at which the file is rotated to path.1, path.2, ...
+        :param backups: Rotated files to keep.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.logger = logging.getLogger(f"{__name__}.{os.path.abspath(path)}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        if not self.logger.handlers:
+            handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+
+    def record(self, seq: int, metrics: TurnMetrics, **fields: Any) -> None:
+        self.logger.info(json.dumps({"ts": round(time.time(), 3), "seq": seq, **fields, **metrics.to_dict()},
+                                    separators=(',', ':')))
+
+    def close(self) -> None:
+        for handler in list(self.logger.handlers):
+            handler.close()
+            self.logger.removeHandler(handler)
+
+def format_hud(seq: int, metrics: TurnMetrics) -> str:
+    """One-line summary of a turn's metrics for the on-screen HUD."""
+    spans = ', '.join(f"{name.removesuffix('_s')} {seconds * 1000:.0f}ms" for name, seconds in metrics.spans.items())
+    tokens = sum(count for name, count in metrics.usage.items() if name.endswith("_total_tokens"))
+    cached = sum(count for name, count in metrics.usage.items() if name.endswith("_cached_tokens"))
+    return f"Turn {seq}: {spans} | {tokens} tokens ({cached} prompt tokens cached)"
@@ -1,15 +1,18 @@
 # monitor_models.py
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Callable
+from collections import defaultdict
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Set, Tuple
 import logging
 from game_state import GameState  # Import GameState for type hints
+from state_schema import (PatchError, Limb, ArmorPiece, Room, patch_inventory, patch_records,
+                          patch_scores, patch_health, patch_time, patch_coordinates, patch_regions)
 
 logger = logging.getLogger(__name__)
 
 class MonitorModel(ABC):
     @abstractmethod
-    def update_state(self, updates: Dict, game_state: 'GameState') -> None:
-        """Update the game state based on provided updates."""
+    def update_state(self, updates: Dict, game_state: 'GameState') -> Optional[bool]:
+        """Update the game state based on provided updates. Return False if the update was rejected."""
         pass
 
 class GenericMonitor(MonitorModel):
@@ -17,66 +20,138 @@ class GenericMonitor(MonitorModel):
         """
         Initialize a generic monitor.
         
-        :param key: The key in the updates dictionary to monitor.
+        :param key: The key in the updates dictionary to monitor. A dotted path such as
+                    "limb.left_leg" subscribes to a nested value when used with MonitorRegistry.
         :param update_func: A function that updates the game state based on the update data.
         """
         self.key = key
         self.update_func = update_func
 
-    def update_state(self, updates: Dict, game_state: 'GameState') -> None:
-        """Update the game state if the monitored key is in the updates."""
-        if self.key in updates:
-            update_data = updates[self.key]
+    def update_state(self, updates: Dict, game_state: 'GameState') -> bool:
+        """Update the game state if the monitored key is in the updates; invalid updates are rejected."""
+        if self.key not in updates:
+            return False
+        update_data = updates[self.key]
+        try:
             self.update_func(update_data, game_state)
-            logger.info(f"Updated state for key '{self.key}'")
+        except PatchError as e:
+            logger.warning(f"Rejected update for key '{self.key}': {e}")
+            return False
+        game_state.mark_dirty(self.key.split('.', 1)[0])
+        logger.debug(f"Updated state for key '{self.key}'")
+        return True
+
+class MonitorRegistry(MonitorModel):
+    def __init__(self, monitors: Iterable[MonitorModel] = ()):
+        """
+        Dispatch updates to monitors indexed by update key.
+
+        Dispatch cost scales with the number of keys in an update, not the number of
+        registered monitors. Several monitors may share a key, a monitor keyed by a
+        dotted path (e.g. "limb.left_leg") receives only that nested value, and
+        post-apply hooks run once per update batch with the set of applied keys.
+        """
+        self.monitors: List[MonitorModel] = []
+        self.by_key: Dict[str, List[MonitorModel]] = defaultdict(list)
+        self.by_path: Dict[str, List[Tuple[List[str], MonitorModel]]] = defaultdict(list)
+        self.post_apply_hooks: List[Callable[[Set[str], 'GameState'], None]] = []
+        for monitor in monitors:
+            self.register(monitor)
+
+    def __iter__(self) -> Iterator[MonitorModel]:
+        return iter(self.monitors)
+
+    def register(self, monitor: MonitorModel, key: Optional[str] = None) -> None:
+        """Register a monitor under its key (or the given key or dotted path)."""
+        key = key or getattr(monitor, "key", None)
+        if key is None:
+            raise ValueError("Monitor has no key; pass one to register()")
+        self.monitors.append(monitor)
+        top, _, rest = key.partition('.')
+        if rest:
+            self.by_path[top].append((rest.split('.'), monitor))
+        else:
+            self.by_key[key].append(monitor)
+
+    def add_post_apply_hook(self, hook: Callable[[Set[str], 'GameState'], None]) -> None:
+        """Call hook(applied_keys, game_state) after each update batch that changed something."""
+        self.post_apply_hooks.append(hook)
+
+    def keys(self) -> List[str]:
+        """Top-level update keys with at least one monitor."""
+        return list(dict.fromkeys(list(self.by_key) + list(self.by_path)))
+
+    def update_state(self, updates: Dict, game_state: 'GameState', run_hooks: bool = True) -> bool:
+        """Dispatch each update key to its monitors and run the post-apply hooks (unless run_hooks is False, e.g. on replay)."""
+        applied: Set[str] = set()
+        for key, value in updates.items():
+            for monitor in self.by_key.get(key, ()):
+                # Repackaged under the monitor's own key, which register(key=...) may have overridden
+                if monitor.update_state({getattr(monitor, "key", key): value}, game_state) is not False:
+                    applied.add(key)
+            for path, monitor in self.by_path.get(key, ()):
+                nested = value
+                for part in path:
+                    if not isinstance(nested, dict) or part not in nested:
+                        break
+                    nested = nested[part]
+                else:
+                    if monitor.update_state({getattr(monitor, "key", key): nested}, game_state) is not False:
+                        applied.add(key)
+
+        if applied:
+            logger.info(f"Updated state for keys {sorted(applied)}")
+            for hook in self.post_apply_hooks if run_hooks else ():
+                hook(applied, game_state)
+        return bool(applied)
 
 # CUSTOM MONITORS -------------------
 # Add your custom monitor logic below
 
-def update_inventory(update_data: Dict, game_state: GameState) -> None:
-    """Update the inventory in the game state."""
-    game_state.state["inventory"] = update_data
+def update_inventory(update_data: Any, game_state: GameState) -> None:
+    """Replace the inventory, or apply an {"add": [...], "remove": [...]} delta."""
+    game_state.state["inventory"] = patch_inventory(game_state.state.get("inventory", []), update_data)
+
+def update_location(update_data: Dict, game_state: GameState) -> None:
+    """Merge new or changed locations into the game state and the spatial index."""
+    locations = patch_records(game_state.state.get("location", {}), update_data, Room, "location")
+    game_state.state["location"] = locations
+    for name in update_data:
+        game_state.spatial.add_room(name, locations[name]["coordinates"])
+
+def update_map(update_data: Dict, game_state: GameState) -> None:
+    """Merge new or changed map regions into the game state and the spatial index."""
+    regions = patch_regions(game_state.state.get("map", {}), update_data)
+    game_state.state["map"] = regions
+    for region in update_data:
+        game_state.spatial.set_region(region, regions[region])
 
-def update_location(update_data: str, game_state: GameState) -> None:
-    """Update the location in the game state."""
-    game_state.state["location"] = update_data
+def update_coordinates(update_data: List[int], game_state: GameState) -> None:
+    """Move the player to new [x, y] coordinates."""
+    game_state.state["coordinates"] = patch_coordinates(update_data)
 
 def update_health(update_data: int, game_state: GameState) -> None:
     """Update the health in the game state with bounds checking."""
-    if "health" not in game_state.state:
-        game_state.state["health"] = 100
-    game_state.state["health"] = max(0, min(100, update_data))
+    game_state.state["health"] = patch_health(update_data)
 
 def update_limbs(update_data: Dict, game_state: GameState) -> None:
     """Update the limb states in the game state."""
-    if "limb" not in game_state.state:
-        game_state.state["limb"] = {}
-    for limb_name, limb_data in update_data.items():
-        game_state.state["limb"][limb_name] = limb_data
+    game_state.state["limb"] = patch_records(game_state.state.get("limb", {}), update_data, Limb, "limb")
 
 def update_skill(update_data: Dict, game_state: GameState) -> None:
     """Update the skill in the game state."""
-    if "skill" not in game_state.state:
-        game_state.state["skill"] = {}
-    for skill_name, skill_level in update_data.items():
-        game_state.state["skill"][skill_name] = skill_level
+    game_state.state["skill"] = patch_scores(game_state.state.get("skill", {}), update_data, "skill", 0, 100)
 
 def update_time(update_data: str, game_state: GameState) -> None:
     """Update the time in the game state."""
-    game_state.state["time"] = update_data
+    game_state.state["time"] = patch_time(update_data)
 
 
 def update_relationships(update_data: Dict, game_state: GameState) -> None:
     """Update the relationships in the game state."""
-    if "relationships" not in game_state.state:
-        game_state.state["relationships"] = {}
-    for character, relationship_score in update_data.items():
-        game_state.state["relationships"][character] = relationship_score
+    game_state.state["relationships"] = patch_scores(game_state.state.get("relationships", {}), update_data, "relationships", -100, 100)
 
 def update_armor(update_data: Dict, game_state: GameState) -> None:
     """Update the armor in the game state."""
-    if "armor" not in game_state.state:
-        game_state.state["armor"] = {}
-    for armor_part, armor_data in update_data.items():
-        game_state.state["armor"][armor_part] = armor_data
+    game_state.state["armor"] = patch_records(game_state.state.get("armor", {}), update_data, ArmorPiece, "armor")
 # -----------------------------------
\ No newline at end of file
@@ -1,9 +1,13 @@
 #narrative_model.py
-from openai import OpenAI
-from typing import List, Dict
+from openai_client import get_client
+from typing import List, Dict, Iterator, Optional
 import logging
 from dotenv import load_dotenv
 import os   
+import time
+from response_cache import ResponseCache
+from metrics import TurnMetrics
+from llm_backend import LLMBackend
 
 load_dotenv()
 
@@ -11,27 +15,117 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL")
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_PROMPT = """
+Summarize the story of this text adventure so far in under 200 words. Keep the names of characters, places and items, the player's goals and any unresolved threads. Write plain prose in the past tense.
+"""
+
 class MainNarrativeModel:
-    def __init__(self, api_key: str, system_prompt: str):
-        """Initialize the narrative model with API key and system prompt."""
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, api_key: str, system_prompt: str, cache: Optional[ResponseCache] = None, temperature: float = 0.7, backend: Optional[LLMBackend] = None):
+        """Initialize the narrative model with API key, system prompt, optional response cache and backend."""
+        self.client = backend or get_client(api_key)
         self.system_prompt = system_prompt
+        # Static instructions first so every request shares a cacheable prefix; the
+        # rolling summary and history (the parts that change) come after it.
+        self.system_message = {"role": "system", "content": system_prompt.strip()}
+        self.cache = cache
+        self.temperature = temperature
+
+    def _build_messages(self, history: List[Dict]) -> List[Dict]:
+        """Build the chat messages for a narrative request from an already budgeted history."""
+        return [self.system_message] + history
+
+    def _cache_key(self, user_input: str, game_state: 'GameState', messages: List[Dict]) -> Optional[str]:
+        """Return the cache key for a request, or None if it must not be cached."""
+        if self.cache is None or not self.cache.should_cache(self.temperature):
+            return None
+        return ResponseCache.make_key(kind="narrative", model=OPENAI_MODEL, temperature=self.temperature,
+                                      messages=messages, state=game_state.state_hash(), user_input=user_input)
 
-    def generate_narrative(self, user_input: str, game_state: 'GameState', history: List[Dict]) -> str:
-        """Generate a narrative based on user input, game state, and history."""
-        # Limit history to the last 20 entries to manage token limits
-        recent_history = history[-20:]
-        # ADD A METER TO ACTIVELY TRACK THE GAME'S CONTEXT SIZE
-        messages = [{"role": "system", "content": self.system_prompt}] + recent_history
+    def generate_narrative(self, user_input: str, game_state: 'GameState', history: List[Dict],
+                           metrics: Optional[TurnMetrics] = None) -> str:
+        """Generate a narrative based on user input, game state, and history, recording spans and usage in metrics."""
+        metrics = metrics or TurnMetrics()
+        with metrics.span("narrative_prompt_s"):
+            messages = self._build_messages(history)
+            cache_key = self._cache_key(user_input, game_state, messages)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
 
+        started = time.perf_counter()
         try:
-            response = self.client.chat.completions.create(
+            response = self.client.create(
                 model=OPENAI_MODEL,
                 messages=messages,
-                temperature=0.7,
+                temperature=self.temperature,
                 max_tokens=1000
             )
-            return response.choices[0].message.content
+            narrative = response.choices[0].message.content
         except Exception as e:
             logger.error(f"Failed to generate narrative: {e}")
-            return "Something went wrong. Please try again."
\ No newline at end of file
+            return "Something went wrong. Please try again."
+        elapsed = time.perf_counter() - started
+        metrics.add("narrative_ttft_s", elapsed)  # Nothing arrives before the whole response
+        metrics.add("narrative_api_s", elapsed)
+        metrics.add_usage("narrative", getattr(response, "usage", None))
+
+        if cache_key:
+            self.cache.put(cache_key, narrative)
+        return narrative
+
+    def stream_narrative(self, user_input: str, game_state: 'GameState', history: List[Dict],
+                         metrics: Optional[TurnMetrics] = None) -> Iterator[str]:
+        """Generate a narrative like generate_narrative, yielding text chunks as they arrive."""
+        metrics = metrics or TurnMetrics()
+        with metrics.span("narrative_prompt_s"):
+            messages = self._build_messages(history)
+            cache_key = self._cache_key(user_input, game_state, messages)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        chunks: List[str] = []
+        started = time.perf_counter()
+        try:
+            stream = self.client.stream(
+                model=OPENAI_MODEL,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=1000,
+                stream_options={"include_usage": True}
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if not chunks:
+                        metrics.add("narrative_ttft_s", time.perf_counter() - started)
+                    chunks.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+                metrics.add_usage("narrative", getattr(chunk, "usage", None))  # Only the final chunk carries usage
+        except Exception as e:
+            logger.error(f"Failed to stream narrative: {e}")
+            yield "Something went wrong. Please try again."
+            return
+        metrics.add("narrative_api_s", time.perf_counter() - started)
+
+        if cache_key:
+            self.cache.put(cache_key, ''.join(chunks))
+
+    def summarize(self, previous_summary: str, messages: List[Dict]) -> Optional[str]:
+        """Fold older messages into the rolling story summary; None if the request failed."""
+        transcript = '\n'.join(f"{message['role']}: {message['content']}" for message in messages)
+        prompt = f"Previous summary: {previous_summary or 'none'}\n\nNew events:\n{transcript}"
+
+        try:
+            response = self.client.create(
+                model=OPENAI_MODEL,
+                messages=[{"role": "system", "content": SUMMARY_PROMPT}, {"role": "user", "content": prompt}],
+                temperature=0.3,
+                max_tokens=300
+            )
+            return response.choices[0].message.content or None
+        except Exception as e:
+            logger.error(f"Failed to summarize history: {e}")
+            return None
@@ -0,0 +1,91 @@
+# openai_client.py
+import os
+import time
+import random
+import logging
+import threading
+from typing import Any, Iterator, Optional
+import httpx
+from openai import OpenAI, APIConnectionError, APITimeoutError, RateLimitError, InternalServerError
+from dotenv import load_dotenv
+from llm_backend import LLMBackend
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Connection, timeout and retry settings (override in .env)
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)
+
+class PooledClient(LLMBackend):
+    def __init__(self, api_key: Optional[str], max_retries: int = OPENAI_MAX_RETRIES,
+                 max_concurrency: int = OPENAI_MAX_CONCURRENCY, base_delay: float = 0.5, max_delay: float = 8.0):
+        """
+        OpenAI client with keep-alive connection pooling, timeouts, jittered retries and a concurrency limit.
+
+        :param api_key: OpenAI API key.
+        :param max_retries: Retries after the first attempt for transient errors.
+        :param max_concurrency: Maximum requests in flight across all callers.
+        :param base_delay: First backoff delay in seconds; doubles each retry.
+        :param max_delay: Upper bound for a single backoff delay.
+        """
+        http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS,
+                                max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                                keepalive_expiry=60),
+            timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+        )
+        # Retries are handled here so they share the concurrency limit and jitter policy
+        self.openai = OpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _create_with_retries(self, **kwargs: Any) -> Any:
+        """Call chat.completions.create, retrying transient failures with jittered backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.openai.chat.completions.create(**kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"OpenAI request failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+
+    def create(self, **kwargs: Any) -> Any:
+        """Create a chat completion within the concurrency limit."""
+        with self.slots:
+            return self._create_with_retries(**kwargs)
+
+    def stream(self, **kwargs: Any) -> Iterator[Any]:
+        """Stream a chat completion, holding a concurrency slot until the stream ends."""
+        with self.slots:
+            stream = self._create_with_retries(stream=True, **kwargs)
+            try:
+                for chunk in stream:
+                    yield chunk
+            finally:
+                stream.close()
+
+_shared_client: Optional[PooledClient] = None
+_shared_lock = threading.Lock()
+
+def get_client(api_key: Optional[str] = None) -> PooledClient:
+    """Return the process-wide pooled client, creating it on first use."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = PooledClient(api_key or os.getenv("OPENAI_API_KEY"))
+        return _shared_client
@@ -0,0 +1,135 @@
+# response_cache.py
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256, cache_dir: Optional[str] = None,
+                 max_disk_bytes: int = 50 * 1024 * 1024, max_temperature: float = 0.3):
+        """
+        Content-addressed cache for model completions.
+
+        :param max_entries: Size of the in-memory LRU tier.
+        :param cache_dir: Directory for the optional on-disk tier (None disables it).
+        :param max_disk_bytes: Size at which the oldest disk entries are evicted.
+        :param max_temperature: Completions sampled above this temperature are not cached,
+                                since replaying them would hide the model's variety.
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_temperature = max_temperature
+        self.memory: "OrderedDict[str, str]" = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.disk_bytes = 0
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.disk_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.is_file())
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """Build a stable key from the request inputs."""
+        payload = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def should_cache(self, temperature: float) -> bool:
+        """Return True if a completion sampled at this temperature is safe to reuse."""
+        return temperature <= self.max_temperature
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached completion from memory, then disk, or None."""
+        with self._lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return self.memory[key]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        """Store a completion in memory and, if enabled, on disk."""
+        with self._lock:
+            self._remember(key, value)
+        self._write_disk(key, value)
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the overall hit rate."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "disk_bytes": self.disk_bytes,
+        }
+
+    def _remember(self, key: str, value: str) -> None:
+        """Insert into the LRU tier, evicting the least recently used entry."""
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        """Read an entry from the disk tier."""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to read cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, value: str) -> None:
+        """Write an entry to the disk tier and evict the oldest entries past the size limit."""
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        try:
+            existing = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            with self._lock:
+                self.disk_bytes += os.path.getsize(path) - existing
+                if self.disk_bytes > self.max_disk_bytes:
+                    self._evict_disk()
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key}: {e}")
+
+    def _evict_disk(self) -> None:
+        """Delete the least recently written entries until the disk tier fits."""
+        entries = sorted((entry for entry in os.scandir(self.cache_dir) if entry.is_file()),
+                         key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self.disk_bytes <= self.max_disk_bytes:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+                self.disk_bytes -= size
+            except OSError as e:
+                logger.warning(f"Failed to evict cache entry {entry.name}: {e}")
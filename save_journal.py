@@ -0,0 +1,144 @@
+# save_journal.py
+import os
+import json
+import glob
+import time
+import queue
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATTERN = "snapshot_{seq:08d}.json"
+SEGMENT_PATTERN = "journal_{seq:08d}.jsonl"
+
+def _seq_of(path: str) -> int:
+    """Sequence number encoded in a snapshot or journal segment file name."""
+    return int(os.path.splitext(os.path.basename(path))[0].rsplit('_', 1)[1])
+
+class SaveJournal:
+    def __init__(self, directory: str, snapshot_interval: int = 25):
+        """
+        Append-only save journal with periodic snapshots.
+
+        Each turn appends its input, narrative and applied updates to the current
+        journal segment. Every snapshot_interval turns a compact snapshot of the state
+        and history is written and a new segment is started; older snapshots and
+        segments are then deleted. All writes happen on a background thread, so
+        saving never blocks a turn.
+
+        :param directory: Save directory (created if missing).
+        :param snapshot_interval: Turns between snapshots.
+        """
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        os.makedirs(directory, exist_ok=True)
+        segments = sorted(glob.glob(os.path.join(directory, "journal_*.jsonl")))
+        self.segment_path = segments[-1] if segments else os.path.join(directory, SEGMENT_PATTERN.format(seq=1))
+        self.records: "queue.Queue[Optional[Tuple[str, Any]]]" = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name="save-journal", daemon=True)
+        self.writer.start()
+
+    def record_turn(self, seq: int, user_input: str, narrative: str, updates: Dict) -> None:
+        """Queue a turn record: its input, narrative and the updates that were applied."""
+        self.records.put(("turn", {"seq": seq, "input": user_input, "narrative": narrative, "updates": updates}))
+
+    def snapshot_due(self, seq: int, last_snapshot: int) -> bool:
+        """Whether snapshot_interval turns have finished since the snapshot at last_snapshot."""
+        return seq - last_snapshot >= self.snapshot_interval
+
+    def snapshot(self, seq: int, state: Dict, history: Dict) -> None:
+        """Queue a snapshot. Pass copies: they are serialized later on the writer thread."""
+        self.records.put(("snapshot", {"seq": seq, "state": state, "history": history}))
+
+    def close(self) -> None:
+        """Flush queued records and stop the writer thread."""
+        self.records.put(None)
+        self.writer.join()
+
+    def _write_loop(self) -> None:
+        """Drain queued records in batches; one open/flush per batch."""
+        while True:
+            batch = [self.records.get()]
+            while True:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines: List[str] = []
+            for record in batch:
+                if record is None or record[0] == "snapshot":
+                    self._append(lines)
+                    lines = []
+                    if record is None:
+                        return
+                    self._write_snapshot(record[1])
+                else:
+                    lines.append(json.dumps(record[1], separators=(',', ':')))
+            self._append(lines)
+
+    def _append(self, lines: List[str]) -> None:
+        """Append lines to the current journal segment."""
+        if not lines:
+            return
+        try:
+            with open(self.segment_path, "a", encoding="utf-8") as f:
+                f.write('\n'.join(lines) + '\n')
+        except OSError as e:
+            logger.error(f"Failed to append to save journal: {e}")
+
+    def _write_snapshot(self, snapshot: Dict) -> None:
+        """Write a snapshot atomically, start a new segment and drop what it supersedes."""
+        seq = snapshot["seq"]
+        path = os.path.join(self.directory, SNAPSHOT_PATTERN.format(seq=seq))
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.error(f"Failed to write snapshot {seq}: {e}")
+            return
+
+        self.segment_path = os.path.join(self.directory, SEGMENT_PATTERN.format(seq=seq + 1))
+        superseded = [old for old in glob.glob(os.path.join(self.directory, "snapshot_*.json")) if _seq_of(old) < seq]
+        superseded += [old for old in glob.glob(os.path.join(self.directory, "journal_*.jsonl")) if _seq_of(old) <= seq]
+        for old in superseded:
+            try:
+                os.remove(old)
+            except OSError as e:
+                logger.warning(f"Failed to remove {old}: {e}")
+
+    @staticmethod
+    def archive(directory: str) -> Optional[str]:
+        """Move an existing save directory aside (to directory.YYYYmmdd-HHMMSS) so a new game starts empty; return its new path."""
+        if not os.path.isdir(directory):
+            return None
+        archived = f"{directory.rstrip(os.sep)}.{time.strftime('%Y%m%d-%H%M%S')}"
+        os.rename(directory, archived)
+        logger.info(f"Archived save {directory} to {archived}")
+        return archived
+
+    @staticmethod
+    def read(directory: str) -> Tuple[Optional[Dict], List[Dict]]:
+        """Return the latest snapshot (or None) and the turn records written after it."""
+        snapshots = sorted(glob.glob(os.path.join(directory, "snapshot_*.json")))
+        snapshot = None
+        if snapshots:
+            with open(snapshots[-1], "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        after = snapshot["seq"] if snapshot else 0
+
+        turns: List[Dict] = []
+        for segment in sorted(glob.glob(os.path.join(directory, "journal_*.jsonl"))):
+            with open(segment, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Skipping corrupt journal line in {segment}")  # e.g. a torn final write
+                        continue
+                    if record["seq"] > after:
+                        turns.append(record)
+        return snapshot, turns
@@ -0,0 +1,73 @@
+# scrollback.py
+import os
+import json
+import tempfile
+import logging
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ScrollbackLog:
+    def __init__(self, path: Optional[str] = None):
+        """
+        Append-only on-disk log of displayed output blocks.
+
+        Each block is one JSON line of [tag, text]. Only the byte offset of each
+        block is kept in memory, so any range of blocks can be read back without
+        holding the transcript. An existing log is reopened and extended.
+
+        :param path: Log file; a temporary file (deleted on close) if omitted.
+        """
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="scrollback_", suffix=".jsonl")
+            os.close(fd)
+            self.temporary = True
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.temporary = False
+        self.path = path
+        self.file = open(path, "a+b")
+        self.offsets: List[int] = []
+        self.file.seek(0)
+        offset = 0
+        line = b""
+        for line in self.file:
+            self.offsets.append(offset)
+            offset += len(line)
+        if line and not line.endswith(b"\n"):  # Torn final write; start the next block on its own line
+            self.file.write(b"\n")
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def append(self, tag: str, text: str) -> int:
+        """Write a block and return its index."""
+        self.file.seek(0, os.SEEK_END)
+        self.offsets.append(self.file.tell())
+        self.file.write(json.dumps([tag, text]).encode("utf-8") + b"\n")
+        self.file.flush()
+        return len(self.offsets) - 1
+
+    def read(self, start: int, stop: int) -> List[Tuple[str, str]]:
+        """Return blocks [start, stop) as (tag, text) pairs."""
+        start, stop = max(0, start), min(stop, len(self.offsets))
+        if start >= stop:
+            return []
+        self.file.seek(self.offsets[start])
+        blocks = []
+        for _ in range(stop - start):
+            try:
+                tag, text = json.loads(self.file.readline())
+            except ValueError:
+                logger.warning(f"Skipping corrupt scrollback block in {self.path}")
+                tag, text = "normal", "\n"
+            blocks.append((tag, text))
+        return blocks
+
+    def close(self) -> None:
+        self.file.close()
+        if self.temporary:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
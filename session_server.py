@@ -0,0 +1,206 @@
+# session_server.py
+"""
+Asyncio server hosting many game sessions in one process.
+
+Each TCP connection gets its own GameSession. The protocol is line based:
+the client sends one line of player input per turn and receives one JSON
+object per line. Lines starting with "/" are commands: /state, /stats, /quit.
+
+    python session_server.py --port 7777 --concurrency 32 [--mock]
+"""
+import json
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional, Set, Tuple
+from game_session import GameSession, TurnResult
+
+logger = logging.getLogger(__name__)
+
+class SessionServer:
+    def __init__(self, session_factory: Callable[[], GameSession], max_concurrency: int = 16, stats_interval: float = 10.0):
+        """
+        Host sessions and schedule their turns fairly over a bounded worker pool.
+
+        Each session runs at most one turn at a time. Sessions with queued input are
+        served round-robin, so one busy player can't starve the others.
+
+        :param session_factory: Creates a new GameSession for each connection.
+        :param max_concurrency: Maximum turns (and so LLM call chains) in flight.
+        :param stats_interval: Seconds between logged stats reports (0 disables them).
+        """
+        self.session_factory = session_factory
+        self.max_concurrency = max_concurrency
+        self.stats_interval = stats_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="session")
+        self.sessions: Dict[str, GameSession] = {}
+        self.pending: Dict[str, Deque[Tuple[str, asyncio.Future]]] = {}
+        self.ready: Deque[str] = deque()
+        self.running: Set[str] = set()
+        self.wakeup: Optional[asyncio.Event] = None
+
+        self.started = time.perf_counter()
+        self.sessions_created = 0
+        self.turns_completed = 0
+
+    def open_session(self) -> Tuple[str, GameSession]:
+        """Create and register a new session."""
+        session_id = uuid.uuid4().hex[:12]
+        session = self.session_factory()
+        self.sessions[session_id] = session
+        self.pending[session_id] = deque()
+        self.sessions_created += 1
+        return session_id, session
+
+    def close_session(self, session_id: str) -> None:
+        """Forget a session and cancel its queued turns."""
+        self.sessions.pop(session_id, None)
+        for _, future in self.pending.pop(session_id, deque()):
+            future.cancel()
+
+    async def submit(self, session_id: str, user_input: str) -> TurnResult:
+        """Queue a turn for a session and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self.pending[session_id].append((user_input, future))
+        if session_id not in self.running and session_id not in self.ready:
+            self.ready.append(session_id)
+        self.wakeup.set()
+        return await future
+
+    def queue_depth(self) -> int:
+        """Number of turns waiting to start."""
+        return sum(len(queue) for queue in self.pending.values())
+
+    def stats(self) -> Dict[str, float]:
+        """Return server throughput and load figures."""
+        uptime = time.perf_counter() - self.started
+        return {
+            "sessions": len(self.sessions),
+            "sessions_per_s": self.sessions_created / uptime if uptime else 0.0,
+            "turns_per_s": self.turns_completed / uptime if uptime else 0.0,
+            "queue_depth": self.queue_depth(),
+            "running": len(self.running),
+            "uptime_s": uptime,
+        }
+
+    async def _schedule(self) -> None:
+        """Start queued turns round-robin across sessions while worker slots are free."""
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while self.ready and len(self.running) < self.max_concurrency:
+                session_id = self.ready.popleft()
+                if self.pending.get(session_id):
+                    user_input, future = self.pending[session_id].popleft()
+                    self.running.add(session_id)
+                    asyncio.create_task(self._run_turn(session_id, self.sessions[session_id], user_input, future))
+
+    async def _run_turn(self, session_id: str, session: GameSession, user_input: str, future: asyncio.Future) -> None:
+        """Run one queued turn for a session on the worker pool."""
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, session.submit, user_input)
+            if not future.done():
+                future.set_result(result)
+            self.turns_completed += 1
+        except Exception as e:
+            logger.error(f"Turn failed for session {session_id}: {e}")
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self.running.discard(session_id)
+            if self.pending.get(session_id):
+                self.ready.append(session_id)  # Back of the line: round-robin fairness
+            self.wakeup.set()
+
+    async def _report_stats(self) -> None:
+        """Log stats periodically."""
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            logger.info(f"Server stats: {self.stats()}")
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one connection: one session, one JSON line per response."""
+        session_id, session = self.open_session()
+
+        async def send(message: Dict) -> None:
+            writer.write((json.dumps(message) + "\n").encode("utf-8"))
+            await writer.drain()
+
+        try:
+            await send({"type": "welcome", "session": session_id, "text": session.initial_message or ""})
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                user_input = line.decode("utf-8").strip()
+                if not user_input:
+                    continue
+                if user_input == "/quit":
+                    break
+                if user_input == "/state":
+                    await send({"type": "state", "state": session.game_state.state})
+                elif user_input == "/stats":
+                    await send({"type": "stats", "stats": self.stats()})
+                else:
+                    result = await self.submit(session_id, user_input)
+                    await send({"type": "turn", "seq": result.seq, "narrative": result.narrative,
+                                "updates": result.updates, "applied": result.applied, "error": result.error})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.close_session(session_id)
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 7777, ready: Optional[asyncio.Event] = None) -> None:
+        """Run the server until cancelled."""
+        self.wakeup = asyncio.Event()
+        scheduler = asyncio.create_task(self._schedule())
+        reporter = asyncio.create_task(self._report_stats()) if self.stats_interval else None
+        server = await asyncio.start_server(self.handle_client, host, port)
+        self.address = server.sockets[0].getsockname()
+        logger.info(f"Session server listening on {self.address}")
+        if ready:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            scheduler.cancel()
+            if reporter:
+                reporter.cancel()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+def make_session_factory(backend=None) -> Callable[[], GameSession]:
+    """Build sessions from the prompts and initial state in main.py, sharing one response cache."""
+    from main import INITIAL_STATE, MONITORS, SYSTEM_PROMPT_NARRATIVE, SYSTEM_PROMPT_UPDATES, INITIAL_MESSAGE
+    from response_cache import ResponseCache
+    cache = ResponseCache()
+
+    def factory() -> GameSession:
+        return GameSession(INITIAL_STATE, SYSTEM_PROMPT_NARRATIVE, SYSTEM_PROMPT_UPDATES, MONITORS,
+                           initial_message=INITIAL_MESSAGE, response_cache=cache, backend=backend)
+    return factory
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host many game sessions over a line-based TCP protocol.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum turns in flight.")
+    parser.add_argument("--mock", action="store_true", help="Use the local mock backend instead of OpenAI.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    backend = None
+    if args.mock:
+        from llm_backend import MockBackend
+        backend = MockBackend(latency=0.2)
+
+    server = SessionServer(make_session_factory(backend), max_concurrency=args.concurrency)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
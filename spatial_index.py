@@ -0,0 +1,151 @@
+# spatial_index.py
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+Coordinates = Tuple[int, int]
+
+# Grid steps between 4-connected cells; +y is north and +x is east
+DIRECTIONS: Dict[Coordinates, str] = {(0, 1): "north", (1, 0): "east", (0, -1): "south", (-1, 0): "west"}
+
+class SpatialIndex:
+    def __init__(self):
+        """
+        Grid hash of location coordinates plus an adjacency graph of rooms.
+
+        Rooms are connected when they sit on 4-neighbouring grid cells or are listed
+        in the same map region. Both structures are updated one room or region at a
+        time, so monitors can keep the index current without rebuilding it.
+        """
+        self.cells: Dict[Coordinates, Set[str]] = defaultdict(set)
+        self.positions: Dict[str, Coordinates] = {}
+        self.regions: Dict[str, Set[str]] = {}
+        self.room_regions: Dict[str, Set[str]] = defaultdict(set)
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "SpatialIndex":
+        """Build an index from a game state's "location" and "map" entries."""
+        index = cls()
+        for name, room in state.get("location", {}).items():
+            if isinstance(room, dict) and isinstance(room.get("coordinates"), list) and len(room["coordinates"]) == 2:
+                index.add_room(name, room["coordinates"])
+        for region, rooms in state.get("map", {}).items():
+            if isinstance(rooms, list):
+                index.set_region(region, rooms)
+        return index
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.positions
+
+    def add_room(self, name: str, coordinates: Iterable[int]) -> None:
+        """Add a room, or move it if it is already indexed."""
+        position = tuple(coordinates)
+        previous = self.positions.get(name)
+        if previous == position:
+            return
+        if previous is not None:
+            self._discard_cell(name, previous)
+        self.positions[name] = position
+        self.cells[position].add(name)
+
+    def remove_room(self, name: str) -> None:
+        position = self.positions.pop(name, None)
+        if position is not None:
+            self._discard_cell(name, position)
+
+    def _discard_cell(self, name: str, position: Coordinates) -> None:
+        self.cells[position].discard(name)
+        if not self.cells[position]:
+            del self.cells[position]
+
+    def set_region(self, region: str, rooms: Iterable[str]) -> None:
+        """Replace the rooms listed under a map region."""
+        for room in self.regions.get(region, ()):
+            self.room_regions[room].discard(region)
+        self.regions[region] = set(rooms)
+        for room in self.regions[region]:
+            self.room_regions[room].add(region)
+
+    def rooms_at(self, coordinates: Iterable[int]) -> List[str]:
+        return sorted(self.cells.get(tuple(coordinates), ()))
+
+    def neighbours(self, coordinates: Iterable[int]) -> Dict[str, List[str]]:
+        """Rooms on the four cells next to coordinates, keyed by compass direction."""
+        x, y = coordinates
+        found = {}
+        for (dx, dy), direction in DIRECTIONS.items():
+            rooms = self.cells.get((x + dx, y + dy))
+            if rooms:
+                found[direction] = sorted(rooms)
+        return found
+
+    def connected(self, name: str) -> Set[str]:
+        """Rooms reachable in one step: on a neighbouring cell or in a shared region."""
+        linked: Set[str] = set()
+        position = self.positions.get(name)
+        if position is not None:
+            for rooms in self.neighbours(position).values():
+                linked.update(rooms)
+        for region in self.room_regions.get(name, ()):
+            linked.update(room for room in self.regions[region] if room in self.positions)
+        linked.discard(name)
+        return linked
+
+    def nearest(self, coordinates: Iterable[int], limit: int = 3, max_distance: int = 16,
+                exclude: Iterable[str] = ()) -> List[Tuple[str, int]]:
+        """
+        Up to limit rooms closest to coordinates by grid (Manhattan) distance, nearest first.
+
+        Searches outward ring by ring over the grid hash, so the cost depends on the
+        distance searched rather than on how many rooms the world holds.
+        """
+        x, y = coordinates
+        excluded = set(exclude)
+        found: List[Tuple[str, int]] = []
+        for distance in range(max_distance + 1):
+            ring = [(x + dx, y + sign * (distance - abs(dx)))
+                    for dx in range(-distance, distance + 1)
+                    for sign in ((1, -1) if distance - abs(dx) else (1,))]
+            for cell in ring:
+                found += [(room, distance) for room in sorted(self.cells.get(cell, ())) if room not in excluded]
+            if len(found) >= limit:
+                break
+        return found[:limit]
+
+    def shortest_path(self, start: str, goal: str) -> Optional[List[str]]:
+        """Fewest-steps route between two rooms over the adjacency graph, or None if unreachable."""
+        if start not in self.positions or goal not in self.positions:
+            return None
+        previous: Dict[str, Optional[str]] = {start: None}
+        frontier = deque([start])
+        while frontier:
+            room = frontier.popleft()
+            if room == goal:
+                path = []
+                while room is not None:
+                    path.append(room)
+                    room = previous[room]
+                return path[::-1]
+            for linked in sorted(self.connected(room)):
+                if linked not in previous:
+                    previous[linked] = room
+                    frontier.append(linked)
+        return None
+
+    def describe(self, coordinates: Iterable[int], destinations: Iterable[str] = ()) -> str:
+        """Summarize the player's surroundings and routes to the given rooms for a prompt."""
+        here = self.rooms_at(coordinates)
+        lines = [f"Here: {', '.join(here) or 'unexplored'}"]
+        exits = self.neighbours(coordinates)
+        if exits:
+            lines.append("Exits: " + '; '.join(f"{direction}: {', '.join(rooms)}" for direction, rooms in exits.items()))
+        elif not here:
+            nearest = self.nearest(coordinates)
+            if nearest:
+                lines.append("Nearest: " + ', '.join(f"{room} ({distance} steps)" for room, distance in nearest))
+        for destination in destinations:
+            if destination in here:
+                continue
+            path = next((p for p in (self.shortest_path(room, destination) for room in here) if p), None)
+            if path:
+                lines.append(f"Route to {destination}: {' -> '.join(path)}")
+        return '\n'.join(lines)
@@ -0,0 +1,185 @@
+# state_schema.py
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+class PatchError(ValueError):
+    """Raised when an update does not match the game state schema."""
+    pass
+
+def _int(value: Any, field: str, low: int, high: int) -> int:
+    """Validate a number and clamp it to [low, high]."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise PatchError(f"{field} must be a number, got {value!r}")
+    return max(low, min(high, int(value)))
+
+def _str(value: Any, field: str) -> str:
+    """Validate a non-empty string; repeated values like statuses are interned."""
+    if not isinstance(value, str) or not value.strip():
+        raise PatchError(f"{field} must be a non-empty string, got {value!r}")
+    return sys.intern(value.strip())
+
+def _dict(value: Any, field: str) -> Dict:
+    if not isinstance(value, dict):
+        raise PatchError(f"{field} must be an object, got {type(value).__name__}")
+    return value
+
+def _coordinates(value: Any, field: str) -> List[int]:
+    if (not isinstance(value, list) or len(value) != 2
+            or not all(isinstance(c, int) and not isinstance(c, bool) for c in value)):
+        raise PatchError(f"{field} must be [x, y] integers, got {value!r}")
+    return list(value)
+
+def _str_list(value: Any, field: str) -> List[str]:
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise PatchError(f"{field} must be a list of strings, got {value!r}")
+    return [item for item in value]
+
+@dataclass(slots=True)
+class Limb:
+    hp: int
+    status: str
+    holding: Optional[str] = None
+
+    @classmethod
+    def patch(cls, name: str, current: Optional[Dict], data: Any) -> "Limb":
+        """Merge a (possibly partial) limb update onto the current limb and validate it."""
+        merged = {**(current or {}), **_dict(data, f"limb.{name}")}
+        holding = merged.get("holding")
+        return cls(
+            hp=_int(merged.get("hp"), f"limb.{name}.hp", 0, 100),
+            status=_str(merged.get("status"), f"limb.{name}.status"),
+            holding=None if holding is None else _str(holding, f"limb.{name}.holding"),
+        )
+
+    def to_dict(self) -> Dict:
+        data = {"hp": self.hp, "status": self.status}
+        if self.holding is not None:
+            data["holding"] = self.holding
+        return data
+
+@dataclass(slots=True)
+class ArmorPiece:
+    name: str
+    hp: int
+    status: str
+
+    @classmethod
+    def patch(cls, slot: str, current: Optional[Dict], data: Any) -> "ArmorPiece":
+        """Merge a (possibly partial) armor update onto the current piece and validate it."""
+        merged = {**(current or {}), **_dict(data, f"armor.{slot}")}
+        return cls(
+            name=_str(merged.get("name"), f"armor.{slot}.name"),
+            hp=_int(merged.get("hp"), f"armor.{slot}.hp", 0, 100),
+            status=_str(merged.get("status"), f"armor.{slot}.status"),
+        )
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "hp": self.hp, "status": self.status}
+
+@dataclass(slots=True)
+class Room:
+    coordinates: List[int]
+    description: str
+    objects: List[str]
+
+    @classmethod
+    def patch(cls, name: str, current: Optional[Dict], data: Any) -> "Room":
+        """Merge a (possibly partial) location update onto the current room and validate it."""
+        merged = {**(current or {}), **_dict(data, f"location.{name}")}
+        return cls(
+            coordinates=_coordinates(merged.get("coordinates"), f"location.{name}.coordinates"),
+            description=_str(merged.get("description", name), f"location.{name}.description"),
+            objects=_str_list(merged.get("objects", []), f"location.{name}.objects"),
+        )
+
+    def to_dict(self) -> Dict:
+        return {"coordinates": self.coordinates, "description": self.description, "objects": self.objects}
+
+# Patch functions: validate an update against the current value and return the new value.
+# They raise PatchError and leave the current value untouched when an update is invalid.
+
+def patch_inventory(current: List[str], data: Any) -> List[str]:
+    """Replace the inventory with a list, or apply an {"add": [...], "remove": [...]} delta."""
+    if isinstance(data, list):
+        return [_str(item, "inventory item") for item in data]
+    delta = _dict(data, "inventory")
+    unknown = set(delta) - {"add", "remove"}
+    if unknown:
+        raise PatchError(f"inventory delta has unknown keys: {sorted(unknown)}")
+    inventory = list(current)
+    for item in _str_list(delta.get("remove", []), "inventory.remove"):
+        if item not in inventory:
+            raise PatchError(f"cannot remove {item!r}: not in inventory")
+        inventory.remove(item)
+    inventory.extend(_str(item, "inventory.add") for item in _str_list(delta.get("add", []), "inventory.add"))
+    return inventory
+
+def patch_records(current: Dict[str, Dict], data: Any, record: type, field: str) -> Dict[str, Dict]:
+    """Merge updates for named records (limbs, armor pieces, rooms) into the current ones."""
+    patched = dict(current)
+    for name, record_data in _dict(data, field).items():
+        patched[name] = record.patch(name, current.get(name), record_data).to_dict()
+    return patched
+
+def patch_regions(current: Dict[str, List[str]], data: Any) -> Dict[str, List[str]]:
+    """Merge map regions (region name -> room names) into the current map."""
+    patched = dict(current)
+    for region, rooms in _dict(data, "map").items():
+        patched[_str(region, "map region")] = [_str(room, f"map.{region}") for room in _str_list(rooms, f"map.{region}")]
+    return patched
+
+def patch_scores(current: Dict[str, int], data: Any, field: str, low: int, high: int) -> Dict[str, int]:
+    """Merge bounded integer scores (skills, relationships) into the current ones."""
+    patched = dict(current)
+    for name, score in _dict(data, field).items():
+        patched[_str(name, f"{field} name")] = _int(score, f"{field}.{name}", low, high)
+    return patched
+
+def patch_health(data: Any) -> int:
+    return _int(data, "health", 0, 100)
+
+def patch_time(data: Any) -> str:
+    return _str(data, "time")
+
+def patch_coordinates(data: Any) -> List[int]:
+    return _coordinates(data, "coordinates")
+
+# JSON schemas for each update key, used to request schema-constrained model output
+_SCORES = {"type": "object", "additionalProperties": {"type": "integer"}}
+UPDATE_SCHEMAS: Dict[str, Dict] = {
+    "inventory": {"anyOf": [
+        {"type": "array", "items": {"type": "string"}},
+        {"type": "object", "properties": {"add": {"type": "array", "items": {"type": "string"}},
+                                          "remove": {"type": "array", "items": {"type": "string"}}},
+         "additionalProperties": False},
+    ]},
+    "location": {"type": "object", "additionalProperties": {
+        "type": "object",
+        "properties": {"coordinates": {"type": "array", "items": {"type": "integer"}, "minItems": 2, "maxItems": 2},
+                       "description": {"type": "string"},
+                       "objects": {"type": "array", "items": {"type": "string"}}},
+    }},
+    "coordinates": {"type": "array", "items": {"type": "integer"}, "minItems": 2, "maxItems": 2},
+    "map": {"type": "object", "additionalProperties": {"type": "array", "items": {"type": "string"}}},
+    "health": {"type": "integer", "minimum": 0, "maximum": 100},
+    "limb": {"type": "object", "additionalProperties": {
+        "type": "object",
+        "properties": {"hp": {"type": "integer"}, "status": {"type": "string"}, "holding": {"type": "string"}},
+    }},
+    "skill": _SCORES,
+    "time": {"type": "string"},
+    "relationships": _SCORES,
+    "armor": {"type": "object", "additionalProperties": {
+        "type": "object",
+        "properties": {"name": {"type": "string"}, "hp": {"type": "integer"}, "status": {"type": "string"}},
+    }},
+}
+
+def build_update_schema(keys: List[str]) -> Dict:
+    """Build the JSON schema for a state update object containing any of the given keys."""
+    return {
+        "type": "object",
+        "properties": {key: UPDATE_SCHEMAS.get(key, {}) for key in keys},
+        "additionalProperties": False,
+    }
@@ -1,10 +1,16 @@
 #state_update_model.py
-import json
-from openai import OpenAI
-from typing import Dict, Tuple, Optional
+from openai_client import get_client
+from typing import Any, Callable, Dict, List, Tuple, Optional
 import logging
 from dotenv import load_dotenv
 import os   
+import time
+from tokens import estimate_tokens
+from metrics import TurnMetrics
+from response_cache import ResponseCache
+from llm_backend import LLMBackend
+from json_stream import StreamingJSONParser
+from state_schema import build_update_schema
 
 load_dotenv()
 
@@ -13,35 +19,141 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL")
 logger = logging.getLogger(__name__)
 
 class StateUpdateModel:
-    def __init__(self, api_key: str, system_prompt: str):
-        """Initialize the state update model with API key and system prompt."""
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, api_key: str, system_prompt: str, compact_state: bool = True, cache: Optional[ResponseCache] = None, temperature: float = 0.2, backend: Optional[LLMBackend] = None, update_keys: Optional[List[str]] = None):
+        """
+        Initialize the state update model with API key, system prompt, optional response cache and backend.
+
+        :param update_keys: Monitored state keys; when given, responses are constrained to their JSON schema.
+        """
+        self.client = backend or get_client(api_key)
         self.system_prompt = system_prompt
+        # The static instructions always lead the request, byte-for-byte identical, so the
+        # provider can serve them from its prompt prefix cache; per-turn content follows.
+        self.system_message = {"role": "system", "content": system_prompt.strip()}
+        self.cache = cache
+        self.temperature = temperature
+        self.compact_state = compact_state
+        self.response_format = None
+        if update_keys:
+            self.response_format = {
+                "type": "json_schema",
+                "json_schema": {"name": "state_updates", "schema": build_update_schema(update_keys), "strict": False},
+            }
+        self.last_token_savings = 0
+        self.total_token_savings = 0
+
+    def _serialize_state(self, user_input: str, narrative: str, game_state: 'GameState') -> str:
+        """
+        Serialize the game state for the prompt, compacted to the slices this turn touches.
+
+        The savings over the full state are only measured with debug logging on:
+        serializing and tokenizing the whole world every turn is the cost compaction avoids.
+        """
+        if not self.compact_state:
+            return f'{game_state.state}'
+
+        compact_state = game_state.to_prompt_context(user_input, narrative)
+        if logger.isEnabledFor(logging.DEBUG):
+            self.last_token_savings = estimate_tokens(f'{game_state.state}') - estimate_tokens(compact_state)
+            self.total_token_savings += self.last_token_savings
+            logger.debug(f"Compact state saved ~{self.last_token_savings} prompt tokens (total ~{self.total_token_savings})")
+        return compact_state
+
+    def _build_prompt(self, user_input: str, narrative: str, game_state: 'GameState', context: str = "") -> str:
+        """Build the per-turn part of the prompt, with optional extra context (e.g. pre-generated locations) after the state."""
+        state_text = self._serialize_state(user_input, narrative, game_state)
+        if context:
+            state_text += f'\n{context}'
+        return f'Current Game State: {state_text}\n\nPlayer Input: {user_input}\nNarrative: {narrative}'
+
+    def _request(self, prompt: str) -> Dict:
+        """Build the completion request arguments, schema-constrained when update keys are known."""
+        request = {
+            "model": OPENAI_MODEL,
+            "messages": [self.system_message, {"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": 1000,
+        }
+        if self.response_format:
+            request["response_format"] = self.response_format
+        return request
+
+    def analyze_narrative(self, user_input: str, narrative: str, game_state: 'GameState',
+                          on_update: Optional[Callable[[str, Any], None]] = None, context: str = "",
+                          metrics: Optional[TurnMetrics] = None) -> Tuple[Dict, Optional[str]]:
+        """
+        Analyze user input and narrative to extract state updates.
+
+        context is extra prompt text about the world that is not part of the state.
+        Prompt build, API and parse spans and token usage are recorded in metrics.
+
+        If on_update is given, the response is streamed and on_update(key, value) is
+        called for each top-level update as soon as it has been fully received.
+        """
+        metrics = metrics or TurnMetrics()
+        with metrics.span("update_prompt_s"):
+            prompt = self._build_prompt(user_input, narrative, game_state, context)
+            logger.debug(f"State update prompt: {prompt}")
+
+            cache_key = None
+            cached = None
+            if self.cache is not None and self.cache.should_cache(self.temperature):
+                cache_key = ResponseCache.make_key(kind="state_update", model=OPENAI_MODEL, temperature=self.temperature,
+                                                   system=self.system_message["content"], prompt=prompt, state=game_state.state_hash(), schema=self.response_format)
+                cached = self.cache.get(cache_key)
+
+        parser = StreamingJSONParser()
+        emitted = set()
+
+        def emit(pairs: List[Tuple[str, Any]]) -> None:
+            if on_update is None:
+                return
+            for key, value in pairs:
+                emitted.add(key)
+                on_update(key, value)
+
+        def feed(text: str) -> List[Tuple[str, Any]]:
+            with metrics.span("update_parse_s"):
+                return parser.feed(text)
+
+        if cached is not None:
+            response_text = cached
+            emit(feed(response_text))
+        else:
+            started = time.perf_counter()
+            try:
+                if on_update is None:
+                    response = self.client.create(**self._request(prompt))
+                    metrics.add("update_ttft_s", time.perf_counter() - started)
+                    metrics.add_usage("update", getattr(response, "usage", None))
+                    response_text = response.choices[0].message.content or ""
+                    feed(response_text)
+                else:
+                    chunks: List[str] = []
+                    for chunk in self.client.stream(**self._request(prompt), stream_options={"include_usage": True}):
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            if not chunks:
+                                metrics.add("update_ttft_s", time.perf_counter() - started)
+                            chunks.append(chunk.choices[0].delta.content)
+                            emit(feed(chunk.choices[0].delta.content))
+                        metrics.add_usage("update", getattr(chunk, "usage", None))
+                    response_text = ''.join(chunks)
+                metrics.add("update_api_s", time.perf_counter() - started)
+                logger.debug(f"State update response: {response_text}")
+            except Exception as e:
+                logger.error(f"Failed to get response from OpenAI API: {e}")
+                if not parser.members:
+                    return {}, "Failed to get response from API."
+                response_text = parser.text
 
-    def analyze_narrative(self, user_input: str, narrative: str, game_state: 'GameState') -> Tuple[Dict, Optional[str]]:
-        """Analyze user input and narrative to extract state updates."""
-        print(f"{self.system_prompt}")
-        prompt = f'{self.system_prompt}\n\nCurrent Game State: {game_state.state}\n\nPlayer Input: {user_input}\nNarrative: {narrative}'
-
-        try:
-            response = self.client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=[{"role": "system", "content": prompt}],
-                temperature=0.2,
-                max_tokens=1000
-            )
-            response_text = response.choices[0].message.content
-            print(f"RESPONSE: {response_text}")
-        except Exception as e:
-            logger.error(f"Failed to get response from OpenAI API: {e}")
-            return {}, "Failed to get response from API."
-
-        try:
-            updates = json.loads(response_text)
-            if not isinstance(updates, dict):
-                logger.warning("State updates are not a dictionary.")
-                return {}, "Invalid response format from API."
-            return updates, None
-        except json.JSONDecodeError as e:
+        with metrics.span("update_parse_s"):
+            updates = parser.result()
+        if updates is None:
             logger.error(f"Failed to parse state updates as JSON: {response_text}")
-            return {}, "Failed to parse response."
\ No newline at end of file
+            return {}, "Failed to parse response."
+        emit([(key, value) for key, value in updates.items() if key not in emitted])
+        if not parser.done:
+            logger.warning(f"State updates were truncated; recovered keys: {list(updates)}")
+        elif cache_key and cached is None:
+            self.cache.put(cache_key, response_text)
+        return updates, None
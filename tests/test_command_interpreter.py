@@ -0,0 +1,102 @@
+# tests/test_command_interpreter.py
+import copy
+import pytest
+from command_interpreter import CommandInterpreter
+from game_state import GameState
+
+STATE = {
+    "health": 80,
+    "coordinates": [0, 0],
+    "inventory": ["Food", "9mm Pistol"],
+    "location": {
+        "Private Office": {"coordinates": [0, 0], "description": "A cramped office", "objects": ["Pen"]},
+        "Conference Room": {"coordinates": [1, 0], "description": "Conference Room", "objects": []},
+        "Lobby": {"coordinates": [0, 1], "description": "A dusty lobby", "objects": [""]},
+        "Roof": {"coordinates": [5, 5], "description": "Roof", "objects": []},
+    },
+    "map": {"Building": ["Private Office", "Conference Room", "Lobby"]},
+    "limb": {
+        "right_hand": {"hp": 100, "status": "healthy", "holding": "Crowbar"},
+        "left_hand": {"hp": 100, "status": "healthy", "holding": "nothing"},
+        "left_leg": {"hp": 40, "status": "crippled"},
+    },
+}
+
+@pytest.fixture
+def game_state():
+    return GameState(copy.deepcopy(STATE))
+
+@pytest.fixture
+def interpreter():
+    return CommandInterpreter()
+
+@pytest.mark.parametrize("command", ["i", "inventory", "Check my inventory", "what am I carrying?"])
+def test_inventory(interpreter, game_state, command):
+    answer = interpreter.interpret(command, game_state)
+    assert answer.command == "inventory"
+    assert "Food, 9mm Pistol" in answer.text
+    assert "Crowbar (right hand)" in answer.text
+    assert answer.updates == {}
+
+def test_look_lists_objects_and_exits(interpreter, game_state):
+    answer = interpreter.interpret("look around", game_state)
+    assert answer.command == "look"
+    assert "A cramped office. You see: Pen." in answer.text
+    assert "north: Lobby" in answer.text and "east: Conference Room" in answer.text
+
+def test_health_lists_injuries(interpreter, game_state):
+    answer = interpreter.interpret("health", game_state)
+    assert answer.text.startswith("Health: 80/100.")
+    assert "left leg crippled (40 hp)" in answer.text
+
+def test_where(interpreter, game_state):
+    answer = interpreter.interpret("Where am I?", game_state)
+    assert answer.command == "where"
+    assert "Private Office" in answer.text
+
+def test_drop_inventory_item(interpreter, game_state):
+    answer = interpreter.interpret("drop the food", game_state)
+    assert answer.command == "drop"
+    assert answer.updates == {"inventory": {"remove": ["Food"]},
+                              "location": {"Private Office": {"objects": ["Pen", "Food"]}}}
+
+def test_drop_held_item(interpreter, game_state):
+    answer = interpreter.interpret("drop crowbar", game_state)
+    assert answer.updates["limb"] == {"right_hand": {"holding": "nothing"}}
+    assert "inventory" not in answer.updates
+    assert answer.updates["location"]["Private Office"]["objects"] == ["Pen", "Crowbar"]
+
+@pytest.mark.parametrize("command", ["drop my gun", "drop the pistol and run", "drop everything"])
+def test_drop_without_exact_match_falls_back(interpreter, game_state, command):
+    assert interpreter.interpret(command, game_state) is None
+
+@pytest.mark.parametrize("command,destination", [
+    ("north", [0, 1]), ("n", [0, 1]), ("go east", [1, 0]), ("go to the lobby", [0, 1]), ("walk into the conference room", [1, 0]),
+])
+def test_move_to_adjacent_room(interpreter, game_state, command, destination):
+    answer = interpreter.interpret(command, game_state)
+    assert answer.command == "move"
+    assert answer.updates == {"coordinates": destination}
+
+@pytest.mark.parametrize("command", [
+    "go west",          # Nothing mapped there
+    "go to the roof",   # Known but not adjacent
+    "lobby",            # No movement verb
+    "attack the raider",
+    "run away",
+])
+def test_move_falls_back(interpreter, game_state, command):
+    assert interpreter.interpret(command, game_state) is None
+
+def test_actions_can_be_disabled(interpreter, game_state):
+    assert interpreter.interpret("drop food", game_state, allow_actions=False) is None
+    assert interpreter.interpret("go north", game_state, allow_actions=False) is None
+    assert interpreter.interpret("inventory", game_state, allow_actions=False).command == "inventory"
+
+def test_stats(interpreter, game_state):
+    for command in ["i", "look", "attack the raider", "go north"]:
+        interpreter.interpret(command, game_state)
+    stats = interpreter.stats()
+    assert stats["local"] == 3 and stats["llm"] == 1
+    assert stats["hit_rate"] == 0.75
+    assert stats["by_command"] == {"inventory": 1, "look": 1, "move": 1}
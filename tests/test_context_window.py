@@ -0,0 +1,27 @@
+# tests/test_context_window.py
+from context_window import ContextWindow
+
+def fill(window, turns):
+    for turn in range(turns):
+        window.append({"role": "user", "content": f"I search room {turn} " * 5})
+        window.append({"role": "assistant", "content": f"You find nothing in room {turn}. " * 5})
+
+def test_failed_summary_keeps_folded_messages():
+    window = ContextWindow(token_budget=200, summary_interval=2)
+    fill(window, 6)
+    folded = list(window.folded)
+    assert folded and window.summary_due()
+
+    assert window.refresh_summary(lambda previous, messages: None) is False
+    assert window.folded == folded
+    assert window.summary == ""
+
+    seen = []
+    def summarize(previous, messages):
+        seen.extend(messages)
+        return "The player searched several empty rooms."
+    fill(window, 1)
+    assert window.refresh_summary(summarize) is True
+    assert seen[:len(folded)] == folded
+    assert not any(message in window.folded for message in folded)
+    assert window.summary == "The player searched several empty rooms."
@@ -0,0 +1,58 @@
+# tests/test_json_stream.py
+import json
+import pytest
+from json_stream import StreamingJSONParser, parse_json_object
+
+UPDATES = {"health": 90, "inventory": {"add": ["Stimpak"]}, "time": "3:05 PM"}
+
+def feed_all(chunks):
+    parser = StreamingJSONParser()
+    completed = []
+    for chunk in chunks:
+        completed += parser.feed(chunk)
+    return completed, parser.result()
+
+def test_code_fenced_response():
+    text = "```json\n" + json.dumps(UPDATES, indent=2) + "\n```"
+    assert parse_json_object(text) == UPDATES
+
+def test_prose_with_braces_before_the_object():
+    text = 'Here are the {state} updates for {"the player"} turn: ' + json.dumps(UPDATES) + " Done {ok}."
+    assert parse_json_object("Sure! Updates in {braces}: " + json.dumps(UPDATES)) == UPDATES
+    assert parse_json_object(text)["health"] == 90
+
+def test_no_object():
+    assert parse_json_object("I couldn't find any updates.") is None
+
+def test_truncated_member_is_recovered():
+    text = '{"health": 90, "inventory": {"add": ["Stimpak", "Ra'
+    assert parse_json_object(text) == {"health": 90, "inventory": {"add": ["Stimpak", "Ra"]}}
+
+def test_unrecoverable_truncated_member_is_dropped():
+    assert parse_json_object('{"health": 90, "time": ') == {"health": 90}
+
+def test_members_complete_as_soon_as_their_value_ends():
+    parser = StreamingJSONParser()
+    assert parser.feed('{"health": 9') == []
+    assert parser.feed('0, "time"') == [("health", 90)]
+    assert parser.feed(': "3:05 PM"}') == [("time", "3:05 PM")]
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_chunk_splits_inside_strings_and_escapes(size):
+    updates = {"location": {"Bar, \"The Tops\"": {"description": "A {loud} room, with \\ slashes", "objects": ["[Sign]"]}},
+               "health": 75}
+    text = "Updates: " + json.dumps(updates)
+    completed, result = feed_all([text[i:i + size] for i in range(0, len(text), size)])
+    assert result == updates
+    assert dict(completed) == updates
+
+def test_chunk_split_after_opening_brace():
+    completed, result = feed_all(["Note the {", "draft}. {", '"health": 5}'])
+    assert result == {"health": 5}
+    assert completed == [("health", 5)]
+
+def test_malformed_member_is_skipped():
+    assert parse_json_object('{"health": 90, "time": 3:05 PM, "coordinates": [1, 2]}') == {"health": 90, "coordinates": [1, 2]}
+
+def test_empty_object_means_no_updates():
+    assert parse_json_object("No changes this turn: {}") == {}
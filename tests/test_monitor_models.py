@@ -0,0 +1,35 @@
+# tests/test_monitor_models.py
+from game_state import GameState
+from monitor_models import GenericMonitor, MonitorRegistry
+
+def set_left_leg(update_data, game_state):
+    game_state.state["limb"]["left_leg"].update(update_data)
+
+def test_path_monitor_counts_as_applied():
+    registry = MonitorRegistry([GenericMonitor("limb.left_leg", set_left_leg)])
+    batches = []
+    registry.add_post_apply_hook(lambda keys, game_state: batches.append(keys))
+    game_state = GameState({"limb": {"left_leg": {"hp": 100}}})
+
+    assert registry.update_state({"limb": {"left_leg": {"hp": 40}}}, game_state) is True
+    assert game_state.state["limb"]["left_leg"] == {"hp": 40}
+    assert batches == [{"limb"}]
+
+def test_path_monitor_without_its_path_is_not_applied():
+    registry = MonitorRegistry([GenericMonitor("limb.left_leg", set_left_leg)])
+    batches = []
+    registry.add_post_apply_hook(lambda keys, game_state: batches.append(keys))
+    game_state = GameState({"limb": {"left_leg": {"hp": 100}}})
+
+    assert registry.update_state({"limb": {"right_leg": {"hp": 40}}}, game_state) is False
+    assert batches == []
+
+def test_register_under_another_key():
+    registry = MonitorRegistry()
+    registry.register(GenericMonitor("health", lambda value, game_state: game_state.state.update(health=value)), key="hp")
+    game_state = GameState({"health": 100})
+
+    assert registry.keys() == ["hp"]
+    assert registry.update_state({"hp": 5}, game_state) is True
+    assert game_state.state["health"] == 5
+    assert registry.update_state({"health": 50}, game_state) is False
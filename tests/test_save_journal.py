@@ -0,0 +1,58 @@
+# tests/test_save_journal.py
+import copy
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("openai")
+
+from game_session import GameSession
+from llm_backend import MockBackend
+from monitor_models import GenericMonitor, update_location, update_relationships, update_time
+from save_journal import SaveJournal
+
+INITIAL_STATE = {
+    "coordinates": [0, 0],
+    "inventory": ["Food"],
+    "relationships": {"NCR": 0},
+    "location": {"Private Office": {"coordinates": [0, 0], "description": "Private Office", "objects": []}},
+    "time": "2:32 PM",
+}
+
+def updates(call, player_input):
+    return {"time": f"3:{call:02d} PM", "relationships": {"NCR": call},
+            "location": {f"Room {call}": {"coordinates": [call, 1], "description": f"Room {call}", "objects": []}}}
+
+def new_session(**kwargs):
+    monitors = [GenericMonitor("location", update_location), GenericMonitor("relationships", update_relationships),
+                GenericMonitor("time", update_time)]
+    return GameSession(copy.deepcopy(INITIAL_STATE), "Narrate.", "Update.", monitors,
+                       backend=MockBackend(updates=updates), **kwargs)
+
+def test_snapshot_waits_for_turns_in_flight(tmp_path):
+    journal = SaveJournal(str(tmp_path), snapshot_interval=3)
+    session = new_session(journal=journal)
+    session.submit("look")  # Turn 1, answered locally
+    turn = session.begin_turn("search the room")  # Turn 2, still in flight...
+    session.narrate(turn)
+    session.record_narrative(turn)
+    session.extract_updates(turn)
+    assert session.try_local("inventory").seq == 3  # ...when turn 3 reaches the snapshot interval
+    session.finish_turn(turn)
+    journal.close()
+
+    restored = new_session(restore_dir=str(tmp_path))
+    assert restored.turn_seq == 3
+    assert "Room 1" in restored.game_state.state["location"]
+    assert restored.game_state.state == session.game_state.state
+
+def test_snapshot_after_interval(tmp_path):
+    journal = SaveJournal(str(tmp_path), snapshot_interval=2)
+    session = new_session(journal=journal)
+    for user_input in ["search the room", "open the door", "look"]:
+        session.submit(user_input)
+    journal.close()
+
+    snapshot, turns = SaveJournal.read(str(tmp_path))
+    assert snapshot["seq"] == 2
+    assert [turn["seq"] for turn in turns] == [3]
+    assert new_session(restore_dir=str(tmp_path)).game_state.state == session.game_state.state
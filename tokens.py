@@ -0,0 +1,31 @@
+# tokens.py
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken  # Optional: exact counts when installed
+except ImportError:
+    tiktoken = None
+
+_encoding = None
+
+def _get_encoding() -> Optional[object]:
+    """Load the tiktoken encoding once, or return None if unavailable."""
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, falling back to estimates: {e}")
+    return _encoding
+
+def estimate_tokens(text: str) -> int:
+    """Count tokens in text with tiktoken, or estimate at ~4 characters per token."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return max(1, len(text) // 4)
@@ -0,0 +1,63 @@
+# turn_pipeline.py
+import queue
+import logging
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+class TurnPipeline:
+    def __init__(self, root: tk.Tk, max_workers: int = 2, poll_interval_ms: int = 30):
+        """
+        Run blocking turn work (LLM calls) off the Tk main thread.
+
+        :param root: The Tk root whose event loop receives results.
+        :param max_workers: Number of background worker threads.
+        :param poll_interval_ms: How often the Tk loop drains the result queue.
+        """
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="turn")
+        self.results: "queue.Queue[tuple]" = queue.Queue()
+        self.poll_interval_ms = poll_interval_ms
+        self._poll_id = None
+        self._closed = False
+        self._poll()
+
+    def submit(self, work: Callable[..., Any], on_done: Callable[[Any, Exception], None], *args: Any) -> None:
+        """Run work(*args) on a worker thread and deliver on_done(result, error) on the Tk thread."""
+        def run() -> None:
+            try:
+                result = work(*args)
+            except Exception as e:
+                logger.error(f"Turn worker failed: {e}")
+                self.post(on_done, None, e)
+            else:
+                self.post(on_done, result, None)
+
+        self.executor.submit(run)
+
+    def post(self, callback: Callable[..., None], *args: Any) -> None:
+        """Schedule callback(*args) on the Tk thread. Safe to call from any thread."""
+        self.results.put((callback, args))
+
+    def _poll(self) -> None:
+        """Drain queued callbacks on the Tk thread and reschedule."""
+        while True:
+            try:
+                callback, args = self.results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Turn callback failed: {e}")
+        if not self._closed:
+            self._poll_id = self.root.after(self.poll_interval_ms, self._poll)
+
+    def shutdown(self) -> None:
+        """Stop polling and release the worker threads."""
+        self._closed = True
+        if self._poll_id:
+            self.root.after_cancel(self._poll_id)
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,49 +1,203 @@
-''' take in GAME_STATE.location
-  "Private Office": {"coordinates": [1, 1], "description": "Private Office", "objects": ["Pen", "Paper"]},
-  
-THEN
-
-  use an LLM to generate a whole world around the player
- "Office Building": {
- "coordinates": [0, 0], 
- "description": "Office Building", 
- "rooms": ["Private Office": {
-            "coordinates": [1, 1], 
-            "description": "Private Office", 
-            "objects": ["General Office Items"]}, 
-        "Conference Room": {
-            "coordinates": [1, 0], 
-            "description": "Conference Room", 
-            "objects": ["General Office Items"]}, 
-        "Lobby": {
-            "coordinates": [0, 1], 
-        "description": "Lobby", 
-        "objects": ["General Items found in lobby"],
-        "Canteen": {
-            "coordinates": [0, 2], 
-        "description": "Canteen", 
-        "objects": ["General Food Items"]
-    ]
-}
-'''
-
-
-from openai import OpenAI
-from dotenv import load_dotenv
+# world_generation.py
 import os
+import json
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from openai_client import get_client
+from llm_backend import LLMBackend
+from json_stream import parse_json_object
+from state_schema import PatchError, Room
 
 load_dotenv()
 
 api_key = os.getenv("OPENAI_API_KEY")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL")
+
+logger = logging.getLogger(__name__)
+
+Coordinates = Tuple[int, int]
+
+WORLD_PROMPT = """
+You are the world builder for a text-based adventure game. Generate one new location for each requested coordinate, consistent in tone and setting with the locations the player already knows about. Neighbouring coordinates should feel connected (rooms of the same building, streets of the same district).
+Return ONLY a JSON object mapping each new location name to {"coordinates": [x, y], "description": str, "objects": List[str]}.
+DO NOT REUSE THE NAMES OF EXISTING LOCATIONS.
+"""
+
+# Marks the line listing the coordinates to generate; the mock backend looks for it too
+COORDINATES_MARKER = "Coordinates to generate:"
+
+def neighbours(coordinates: Coordinates, radius: int = 1) -> List[Coordinates]:
+    """Grid coordinates within radius steps (Manhattan distance) of coordinates, excluding it."""
+    x, y = coordinates
+    return [(x + dx, y + dy)
+            for dx in range(-radius, radius + 1)
+            for dy in range(-radius, radius + 1)
+            if 0 < abs(dx) + abs(dy) <= radius]
+
+class WorldGenerator:
+    def __init__(self, api_key: Optional[str] = None, backend: Optional[LLMBackend] = None, radius: int = 1,
+                 temperature: float = 0.9, max_workers: int = 1, track_installed: bool = False):
+        """
+        Generate locations around the player ahead of time.
+
+        prefetch() looks at the coordinates within radius of the player that no
+        known location occupies and generates rooms for them on a background worker.
+        Generated rooms are cached by coordinates, so when the player moves the
+        new location is already there instead of being invented by the state update
+        model in the same turn.
+
+        :param radius: Steps around the player to keep generated.
+        :param max_workers: Concurrent generation requests.
+        :param track_installed: Keep the rooms moved into the state until pop_installed() (e.g. to save them).
+        """
+        self.client = backend or get_client(api_key)
+        self.radius = radius
+        self.temperature = temperature
+        self.cache: Dict[Coordinates, Dict[str, Dict]] = {}
+        self.pending: Set[Coordinates] = set()
+        self.track_installed = track_installed
+        self.installed: Dict[str, Dict] = {}  # Rooms moved into the state since pop_installed(), if tracked
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="world-gen")
+
+    @staticmethod
+    def player_coordinates(game_state: 'GameState') -> Optional[Coordinates]:
+        coordinates = game_state.state.get("coordinates")
+        if isinstance(coordinates, list) and len(coordinates) == 2:
+            return tuple(coordinates)
+        return None
+
+    def frontier(self, game_state: 'GameState') -> List[Coordinates]:
+        """Coordinates near the player that are neither known, cached nor being generated."""
+        player = self.player_coordinates(game_state)
+        if player is None:
+            return []
+        known = game_state.spatial.cells
+        with self._lock:
+            return [c for c in neighbours(player, self.radius)
+                    if c not in known and c not in self.cache and c not in self.pending]
+
+    def prefetch(self, game_state: 'GameState') -> Optional[Future]:
+        """Queue generation of the player's unexplored surroundings. Call on the thread that owns the state."""
+        coordinates = self.frontier(game_state)
+        if not coordinates:
+            return None
+        with self._lock:
+            self.pending.update(coordinates)
+        # Only names and coordinates go to the worker, so it never reads the live state
+        known = {name: room.get("coordinates") for name, room in game_state.state.get("location", {}).items()
+                 if isinstance(room, dict)}
+        return self.executor.submit(self._generate, coordinates, known)
+
+    def _messages(self, coordinates: List[Coordinates], known: Dict[str, List[int]]) -> List[Dict]:
+        return [
+            {"role": "system", "content": WORLD_PROMPT},
+            {"role": "user", "content": f"Known locations: {json.dumps(known, separators=(',', ':'))}\n"
+                                        f"{COORDINATES_MARKER} {json.dumps([list(c) for c in coordinates])}"},
+        ]
+
+    def _generate(self, coordinates: List[Coordinates], known: Dict[str, List[int]]) -> None:
+        """Generate and cache rooms for the given coordinates. Runs on the worker."""
+        requested = set(coordinates)
+        generated: Dict[Coordinates, Dict[str, Dict]] = {}
+        try:
+            response = self.client.create(
+                model=OPENAI_MODEL,
+                messages=self._messages(coordinates, known),
+                temperature=self.temperature,
+                max_tokens=1000,
+                response_format={"type": "json_object"},
+            )
+            rooms = parse_json_object(response.choices[0].message.content or "") or {}
+            for name, data in rooms.items():
+                if name in known:
+                    continue
+                try:
+                    room = Room.patch(name, None, data)
+                except PatchError as e:
+                    logger.warning(f"Discarded generated location: {e}")
+                    continue
+                if tuple(room.coordinates) in requested:
+                    generated.setdefault(tuple(room.coordinates), {})[name] = room.to_dict()
+        except Exception as e:
+            logger.error(f"Failed to generate world around the player: {e}")
+        finally:
+            with self._lock:
+                self.cache.update(generated)
+                self.pending.difference_update(requested)  # Anything not generated is retried by the next prefetch
+        logger.info(f"Generated {sum(map(len, generated.values()))} locations for {len(generated)}/{len(requested)} coordinates")
+
+    def rooms_near(self, game_state: 'GameState') -> Dict[str, Dict]:
+        """Cached rooms within radius of the player, keyed by name."""
+        player = self.player_coordinates(game_state)
+        if player is None:
+            return {}
+        with self._lock:
+            return {name: room for c in neighbours(player, self.radius) for name, room in self.cache.get(c, {}).items()}
+
+    def prompt_context(self, game_state: 'GameState') -> str:
+        """Describe the pre-generated rooms next to the player for the model prompts."""
+        rooms = self.rooms_near(game_state)
+        if not rooms:
+            return ""
+        return ("Pre-generated neighbouring locations (use these if the player moves there): "
+                + json.dumps(rooms, separators=(',', ':')))
+
+    def take(self, coordinates: Coordinates) -> Optional[Dict[str, Dict]]:
+        """Remove and return the cached rooms at coordinates, counting cache hits and misses."""
+        with self._lock:
+            rooms = self.cache.pop(coordinates, None)
+            if rooms:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return rooms
+
+    def on_state_applied(self, applied_keys: Set[str], game_state: 'GameState') -> None:
+        """
+        Post-apply hook: when the player moves somewhere no known location occupies,
+        install the cached rooms there, then prefetch around the new position.
+        """
+        if not applied_keys.intersection(("coordinates", "location")):
+            return
+        player = self.player_coordinates(game_state)
+        if player is not None and player not in game_state.spatial.cells:
+            rooms = self.take(player)
+            if rooms:
+                game_state.state["location"] = {**game_state.state.get("location", {}), **rooms}
+                for name, room in rooms.items():
+                    game_state.spatial.add_room(name, room["coordinates"])
+                game_state.mark_dirty("location")
+                if self.track_installed:
+                    self.installed.update(rooms)
+                logger.info(f"Entered pre-generated location(s) {list(rooms)} at {list(player)}")
+        self.prefetch(game_state)
+
+    def pop_installed(self) -> Dict[str, Dict]:
+        """Return and clear the rooms installed into the state since the last call, e.g. for saving."""
+        installed, self.installed = self.installed, {}
+        return installed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"cached": len(self.cache), "pending": len(self.pending), "hits": self.hits, "misses": self.misses}
 
-client = OpenAI(api_key=api_key)
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the worker, dropping queued generation requests."""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
 
-response = client.chat.completions.create(
-    model="gpt-4o",
-    messages=[
-        {"role": "system", "content": "You are a helpful assistant."},
-        {"role": "user", "content": "Generate a world around the player."}
-    ]
-)
+if __name__ == "__main__":
+    from main import INITIAL_STATE
+    from game_state import GameState
 
-print(response.choices[0].message.content)
\ No newline at end of file
+    generator = WorldGenerator(api_key)
+    future = generator.prefetch(GameState(INITIAL_STATE))
+    if future:
+        future.result()
+    print(json.dumps({f"{x},{y}": rooms for (x, y), rooms in generator.cache.items()}, indent=2))
+    generator.shutdown()